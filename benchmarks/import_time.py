@@ -0,0 +1,62 @@
+"""
+Benchmark of the time it takes to import the ned package in a fresh interpreter.
+
+Usage:
+python benchmarks/import_time.py [--runs 10]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import ned": "import ned",
+    "list-mode client": "import ned; ned.NedAPI('key', log_level='WARNING')",
+    "import pandas (reference)": "import pandas",
+}
+
+
+def time_statement(statement: str, runs: int) -> float:
+    """
+    Function that returns the median time in seconds to run the statement in a fresh interpreter.
+
+    Parameters:
+    statement (str): The statement to time.
+    runs (int): The number of fresh interpreters to start.
+
+    Returns:
+    float: The median time in seconds.
+    """
+    code = (
+        "import time; _start = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - _start)"
+    )
+    timings = [
+        float(subprocess.check_output([sys.executable, "-c", code], text=True))
+        for _ in range(runs)
+    ]
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, statement in STATEMENTS.items():
+        print(f"{name:<30}{time_statement(statement, args.runs) * 1000:>10.1f} ms")
+
+    loaded = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            "import sys, ned; print('pandas' in sys.modules)",
+        ],
+        text=True,
+    ).strip()
+    print(f"{'pandas loaded by import ned':<30}{loaded:>10}")
+
+
+if __name__ == "__main__":
+    main()
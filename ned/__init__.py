@@ -1 +1,9 @@
 from .ned import NedAPI
+from .pool import NedPool
+from .availability import AvailabilityIndex
+from .vintage import ForecastVintageStore
+from .store import LocalStore
+from .budget import Progress, PartialList, is_complete
+from .assembly import ChunkedResult
+from .backends import register_backend
+from .alignment import AlignedSeries, align_forecast
@@ -0,0 +1,242 @@
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+# Bits of the combined sort key used for the timestamp in seconds, enough until the year 2514
+TIME_BITS = 34
+
+
+class AlignedSeries(NamedTuple):
+    validfrom: "np.ndarray"
+    forecast: "np.ndarray"
+    actual: "np.ndarray"
+    error: "np.ndarray"
+
+
+class _Columns(NamedTuple):
+    points: "pd.Index"
+    point_codes: "np.ndarray"
+    types: "pd.Index"
+    type_codes: "np.ndarray"
+    seconds: "np.ndarray"
+    values: "np.ndarray"
+
+
+def _seconds(validfrom) -> "np.ndarray":
+    # Timestamps, ISO strings or datetimes as UTC seconds since the epoch, naive values are taken as UTC
+    import numpy as np
+    import pandas as pd
+
+    if not pd.api.types.is_datetime64_any_dtype(getattr(validfrom, "dtype", None)):
+        # A timestamp repeats for every series, so only the distinct values are parsed
+        if not isinstance(validfrom, (pd.Series, pd.Index)):
+            validfrom = np.asarray(validfrom, object)
+        codes, uniques = pd.factorize(validfrom)
+        try:
+            parsed = pd.to_datetime(uniques, utc=True, format="ISO8601")
+        except ValueError:
+            # Before pandas 2 there is no ISO8601 format, and datetimes are not strings
+            parsed = pd.to_datetime(uniques, utc=True)
+        return _seconds(parsed)[codes]
+
+    index = pd.DatetimeIndex(pd.to_datetime(validfrom, utc=True))
+    try:
+        return index.as_unit("s").asi8
+    except AttributeError:
+        # Before pandas 2 timestamps are always in nanoseconds
+        return index.asi8 // 10**9
+
+
+def _metadata(result, column: str) -> set:
+    # The distinct values of a metadata column of a long result, if it has the column
+    if isinstance(result, list):
+        return {row[column] for row in result if column in row}
+    if hasattr(result, "column_names"):
+        if column not in result.column_names:
+            return set()
+        return set(result.column(column).unique().to_pylist())
+    if column in getattr(result, "columns", []):
+        return set(result[column].unique())
+    return set()
+
+
+def _columns(
+    result: Union["pd.DataFrame", List[dict], "pa.Table"], value: str
+) -> _Columns:
+    """
+    Function that extracts the point, type, validfrom and value columns of a result as arrays.
+
+    Parameters:
+    result (Union[pd.DataFrame, List[dict], pa.Table]): A result of NedAPI, in the long or wide layout.
+    value (str): The value column.
+
+    Returns:
+    _Columns: The distinct points and types with the code of every row, the validfrom as UTC seconds
+    and the values as float64, without the rows that have no value.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if result is None or len(result) == 0:
+        return _Columns(
+            pd.Index([]),
+            np.array([], np.intp),
+            pd.Index([]),
+            np.array([], np.intp),
+            np.array([], np.int64),
+            np.array([], np.float64),
+        )
+
+    if isinstance(result, pd.DataFrame) and isinstance(result.columns, pd.MultiIndex):
+        # The wide layout, a (point, type) column per series and the validfrom as index
+        rows, series = result.shape
+        point_codes, points = pd.factorize(result.columns.get_level_values(0))
+        type_codes, types = pd.factorize(result.columns.get_level_values(1))
+        values = result.to_numpy(np.float64).ravel(order="F")
+        # The padding of the timestamps a series lacks is not a value
+        present = ~np.isnan(values)
+        return _Columns(
+            pd.Index(points),
+            np.repeat(point_codes, rows)[present],
+            pd.Index(types),
+            np.repeat(type_codes, rows)[present],
+            np.tile(_seconds(result.index), series)[present],
+            values[present],
+        )
+
+    if isinstance(result, list):
+        points = np.array([row["point"] for row in result], object)
+        types = np.array([row["type"] for row in result], object)
+        validfrom = [row["validfrom"] for row in result]
+        values = np.array([row.get(value) for row in result], np.float64)
+    elif hasattr(result, "column_names"):
+        # Arrow tables, as returned by the arrow backend
+        points = result.column("point").to_pandas()
+        types = result.column("type").to_pandas()
+        validfrom = result.column("validfrom").to_pandas()
+        values = result.column(value).to_numpy().astype(np.float64)
+    else:
+        points = result["point"]
+        types = result["type"]
+        validfrom = result["validfrom"]
+        values = result[value].to_numpy(np.float64)
+
+    # Factorized without converting the columns to Python strings
+    point_codes, points = pd.factorize(points)
+    type_codes, types = pd.factorize(types)
+    present = ~np.isnan(values)
+    return _Columns(
+        pd.Index(points),
+        point_codes[present],
+        pd.Index(types),
+        type_codes[present],
+        _seconds(validfrom)[present],
+        values[present],
+    )
+
+
+def align_forecast(
+    forecast: Union["pd.DataFrame", List[dict], "pa.Table"],
+    actual: Union["pd.DataFrame", List[dict], "pa.Table"],
+    value: str = "volume",
+    tolerance: timedelta = timedelta(0),
+) -> Dict[Tuple[str, str], AlignedSeries]:
+    """
+    Function that aligns a forecast with the actual values, per point and type.
+
+    Every forecast row is matched with the latest actual row of the same point and type that
+    is valid from at or before it, within the tolerance (an as-of join). All series are
+    aligned at once: the rows are sorted on a combined series and time key and matched with
+    a binary search, without merging DataFrames.
+
+    Parameters:
+    forecast (Union[pd.DataFrame, List[dict], pa.Table]): The result of get_forecast, in the long or wide layout.
+    actual (Union[pd.DataFrame, List[dict], pa.Table]): The result of a get_* function for the "Current"
+    classification, at the same granularity and timezone.
+    value (str, optional): The value column to compare, for the long layout. Defaults to "volume".
+    tolerance (timedelta, optional): How long before a forecast timestamp an actual value may be valid from.
+    Defaults to 0, exactly matching timestamps.
+
+    Returns:
+    Dict[Tuple[str, str], AlignedSeries]: Per (point, type) the matched validfrom timestamps (UTC) and the
+    forecast, actual and error (forecast - actual) values, ordered by validfrom. Rows without a value (NaN,
+    e.g. the padding of the wide layout) are left out, forecast rows are matched with the latest actual
+    row that has a value.
+    """
+    import numpy as np
+
+    for column in ("granularity", "granularitytimezone"):
+        forecast_values = _metadata(forecast, column)
+        actual_values = _metadata(actual, column)
+        if forecast_values and actual_values and forecast_values != actual_values:
+            raise ValueError(
+                f"The {column} of the forecast {sorted(forecast_values)} does not match "
+                f"the {column} of the actual values {sorted(actual_values)}."
+            )
+
+    if _metadata(actual, "classification") - {"Current"}:
+        raise ValueError("The actual values must have the 'Current' classification.")
+
+    predicted = _columns(forecast, value)
+    measured = _columns(actual, value)
+    split = len(predicted.seconds)
+
+    # One integer code per (point, type), shared by both results
+    points = predicted.points.append(measured.points).unique()
+    types = predicted.types.append(measured.types).unique()
+    number_of_types = max(len(types), 1)
+    series = np.concatenate(
+        [
+            points.get_indexer(columns.points)[columns.point_codes] * number_of_types
+            + types.get_indexer(columns.types)[columns.type_codes]
+            for columns in (predicted, measured)
+        ]
+    ).astype(np.int64)
+    keys = (series << TIME_BITS) + np.concatenate([predicted.seconds, measured.seconds])
+
+    forecast_keys, actual_keys = keys[:split], keys[split:]
+    forecast_order = np.argsort(forecast_keys, kind="stable")
+    actual_order = np.argsort(actual_keys, kind="stable")
+    forecast_keys = forecast_keys[forecast_order]
+    actual_keys = actual_keys[actual_order]
+
+    # The last actual row with a key at or before the forecast key
+    match = np.searchsorted(actual_keys, forecast_keys, side="right") - 1
+    found = match >= 0
+    found[found] &= (
+        actual_keys[match[found]] >> TIME_BITS == forecast_keys[found] >> TIME_BITS
+    ) & (
+        forecast_keys[found] - actual_keys[match[found]]
+        <= int(tolerance.total_seconds())
+    )
+
+    rows = forecast_order[found]
+    matched_series = series[:split][rows]
+    matched_forecast = predicted.values[rows]
+    matched_actual = measured.values[actual_order[match[found]]]
+    matched_validfrom = predicted.seconds[rows].astype("datetime64[s]")
+
+    aligned = {}
+    boundaries = np.flatnonzero(np.diff(matched_series)) + 1
+    for start, end in zip(
+        np.concatenate([[0], boundaries]),
+        np.concatenate([boundaries, [len(rows)]]),
+    ):
+        if start == end:
+            continue
+
+        code = int(matched_series[start])
+        aligned[
+            (points[code // number_of_types], types[code % number_of_types])
+        ] = AlignedSeries(
+            matched_validfrom[start:end],
+            matched_forecast[start:end],
+            matched_actual[start:end],
+            matched_forecast[start:end] - matched_actual[start:end],
+        )
+
+    return aligned
@@ -0,0 +1,339 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from .backends import BACKENDS
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+WIDE_VALUE_COLUMNS: List[str] = [
+    "volume",
+    "capacity",
+    "percentage",
+    "emission",
+    "emissionfactor",
+]
+
+WIDE_DTYPES: Dict[str, str] = {"float32": "f", "float64": "d"}
+
+
+class ListAssembler:
+    """
+    Collects the batches yielded by the API into a single list of dicts.
+    """
+
+    def __init__(self) -> None:
+        self._data: Optional[List[dict]] = None
+
+    def add(self, response: List[dict]) -> None:
+        if not isinstance(response, list):
+            return
+
+        if self._data is None:
+            self._data = list(response)
+        else:
+            self._data.extend(response)
+
+    def result(self) -> Optional[List[dict]]:
+        return self._data
+
+
+class FrameAssembler:
+    """
+    Collects the batches yielded by the API into a single DataFrame.
+
+    The batches are converted one by one and concatenated once at the end, instead of
+    growing the DataFrame on every batch.
+    """
+
+    def __init__(self) -> None:
+        self._frames: List["pd.DataFrame"] = []
+
+    def add(self, response: List[dict]) -> None:
+        import pandas as pd
+
+        self._frames.append(pd.DataFrame(response))
+
+    def result(self) -> Optional["pd.DataFrame"]:
+        import pandas as pd
+
+        if not self._frames:
+            return None
+
+        if len(self._frames) == 1:
+            return self._frames[0]
+
+        return pd.concat(self._frames)
+
+
+class WideAssembler:
+    """
+    Builds a time x (point, type) matrix directly from the batches yielded by the API.
+
+    Only the row index, column index and value of every item are kept while streaming, in
+    compact arrays, so the long format is never materialised.
+
+    Parameters:
+    value (str, optional): The column of the utilizations to use as value. Defaults to "volume".
+    dtype (str, optional): The dtype of the matrix, "float32" or "float64". Defaults to "float64".
+    """
+
+    def __init__(self, value: str = "volume", dtype: str = "float64") -> None:
+        if value not in WIDE_VALUE_COLUMNS:
+            raise ValueError(
+                f"Value column '{value}' not supported, use one of {WIDE_VALUE_COLUMNS}."
+            )
+
+        if dtype not in WIDE_DTYPES:
+            raise ValueError(
+                f"Dtype '{dtype}' not supported, use one of {list(WIDE_DTYPES)}."
+            )
+
+        self._value = value
+        self._dtype = dtype
+        self._rows: Dict[str, int] = {}
+        self._columns: Dict[Tuple[str, str], int] = {}
+        self._row_index = array("q")
+        self._column_index = array("q")
+        self._values = array(WIDE_DTYPES[dtype])
+
+    def add(self, response: List[dict]) -> None:
+        if not isinstance(response, list):
+            return
+
+        for item in response:
+            row = self._rows.setdefault(item["validfrom"], len(self._rows))
+            column = self._columns.setdefault(
+                (item["point"], item["type"]), len(self._columns)
+            )
+            value = item.get(self._value)
+
+            self._row_index.append(row)
+            self._column_index.append(column)
+            self._values.append(float("nan") if value is None else value)
+
+    def result(self) -> Optional["pd.DataFrame"]:
+        import numpy as np
+        import pandas as pd
+
+        if not self._rows:
+            return None
+
+        matrix = np.full((len(self._rows), len(self._columns)), np.nan, self._dtype)
+        row_positions = np.frombuffer(self._row_index, dtype=np.int64)
+        column_positions = np.frombuffer(self._column_index, dtype=np.int64)
+        matrix[row_positions, column_positions] = np.frombuffer(self._values, dtype=self._dtype)
+
+        index = pd.to_datetime(list(self._rows), utc=True)
+        columns = pd.MultiIndex.from_tuples(list(self._columns), names=["point", "type"])
+
+        data = pd.DataFrame(matrix, index=index, columns=columns, copy=False)
+        data.index.name = "validfrom"
+        return data.sort_index().sort_index(axis=1)
+
+
+def estimate_size(response: List[dict]) -> int:
+    """
+    Function that estimates the memory used by a batch of the API, from its first item.
+
+    Parameters:
+    response (List[dict]): The batch.
+
+    Returns:
+    int: The estimated size in bytes.
+    """
+    if not response:
+        return 0
+
+    item = response[0]
+    size = sys.getsizeof(item) + sum(sys.getsizeof(value) for value in item.values())
+    return size * len(response)
+
+
+class ChunkedResult:
+    """
+    Result of a request with `max_memory`, of which the rows are kept in temporary Arrow IPC files.
+
+    The chunks are only loaded when iterated over, memory-mapped one file at a time, so the
+    whole result never has to fit in memory. Use `to_pandas` or `to_list` to load everything at
+    once. The temporary files are removed on `close`, at the end of a with block, or when the
+    result is garbage collected.
+
+    Parameters:
+    directory (str): The temporary directory holding the chunk files.
+    paths (List[str]): The chunk files, in order.
+    rows (int): The total number of rows.
+    as_dataframe (bool): Whether iterating yields DataFrames instead of lists of dicts.
+    """
+
+    def __init__(
+        self, directory: str, paths: List[str], rows: int, as_dataframe: bool
+    ) -> None:
+        self._directory = directory
+        self._paths = paths
+        self._rows = rows
+        self._as_dataframe = as_dataframe
+        self._finalizer = weakref.finalize(
+            self, shutil.rmtree, directory, ignore_errors=True
+        )
+        self.attrs: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __enter__(self) -> "ChunkedResult":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def chunks(self) -> int:
+        return len(self._paths)
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def iter_tables(self) -> Iterator["pa.Table"]:
+        import pyarrow as pa
+
+        for path in self._paths:
+            with pa.memory_map(path) as source:
+                yield pa.ipc.open_file(source).read_all()
+
+    def __iter__(self) -> Iterator[Union["pd.DataFrame", List[dict]]]:
+        for table in self.iter_tables():
+            yield table.to_pandas() if self._as_dataframe else table.to_pylist()
+
+    def to_pandas(self) -> "pd.DataFrame":
+        import pyarrow as pa
+
+        tables = list(self.iter_tables())
+        if not tables:
+            import pandas as pd
+
+            return pd.DataFrame()
+
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+    def to_list(self) -> List[dict]:
+        return [row for table in self.iter_tables() for row in table.to_pylist()]
+
+
+class SpillingAssembler:
+    """
+    Collects the batches yielded by the API and spills them to temporary Arrow IPC files as soon
+    as the buffered batches use more than `max_memory` bytes, so the memory use stays flat
+    regardless of the length of the requested period.
+
+    Parameters:
+    max_memory (int): The maximum number of bytes to buffer before spilling to disk.
+    as_dataframe (bool): Whether the chunks of the result are DataFrames instead of lists of dicts.
+    directory (str, optional): The directory to create the temporary directory in. Defaults to the system default.
+    """
+
+    def __init__(
+        self, max_memory: int, as_dataframe: bool, directory: Optional[str] = None
+    ) -> None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "max_memory requires pyarrow, install it with `pip install ned-py[arrow]`."
+            )
+
+        self._max_memory = max_memory
+        self._as_dataframe = as_dataframe
+        self._directory = tempfile.mkdtemp(prefix="ned-", dir=directory)
+        self._paths: List[str] = []
+        self._buffer: List[dict] = []
+        self._buffered = 0
+        self._rows = 0
+
+    def add(self, response: List[dict]) -> None:
+        if not isinstance(response, list):
+            return
+
+        self._buffer.extend(response)
+        self._buffered += estimate_size(response)
+        self._rows += len(response)
+
+        if self._buffered > self._max_memory:
+            self._spill()
+
+    def _spill(self) -> None:
+        import pyarrow as pa
+
+        if not self._buffer:
+            return
+
+        table = pa.Table.from_pylist(self._buffer)
+        path = os.path.join(self._directory, f"{len(self._paths):06d}.arrow")
+
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        self._paths.append(path)
+        self._buffer = []
+        self._buffered = 0
+
+    def result(self) -> ChunkedResult:
+        self._spill()
+        return ChunkedResult(
+            self._directory, self._paths, self._rows, self._as_dataframe
+        )
+
+
+def get_assembler(
+    as_dataframe: bool,
+    layout: str = "long",
+    value: str = "volume",
+    dtype: str = "float64",
+    max_memory: Optional[int] = None,
+    backend: Optional[str] = None,
+):
+    """
+    Function that returns the assembler for the requested output.
+
+    Parameters:
+    as_dataframe (bool): Whether the long layout should be returned as a DataFrame.
+    layout (str, optional): "long" for one row per point/type/timestamp, "wide" for a time x (point, type) matrix. Defaults to "long".
+    value (str, optional): The value column for the wide layout. Defaults to "volume".
+    dtype (str, optional): The dtype for the wide layout. Defaults to "float64".
+    max_memory (int, optional): Spill the long layout to disk above this number of bytes. Defaults to None.
+    backend (str, optional): "list", "pandas" or a registered backend like "arrow" or "polars" for the long
+    layout. Defaults to None, to use as_dataframe.
+
+    Returns:
+    The assembler to feed the API batches to.
+    """
+
+    if backend in ("list", "pandas"):
+        as_dataframe = backend == "pandas"
+    elif backend is not None:
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Backend '{backend}' not supported, use one of {['list', 'pandas'] + list(BACKENDS)}."
+            )
+        if layout != "long" or max_memory is not None:
+            raise ValueError(
+                f"Backend '{backend}' is only supported for the long layout without max_memory."
+            )
+        return BACKENDS[backend]()
+
+    if layout == "wide":
+        if max_memory is not None:
+            raise ValueError("max_memory is only supported for the long layout.")
+        return WideAssembler(value, dtype)
+    elif layout == "long":
+        if max_memory is not None:
+            return SpillingAssembler(max_memory, as_dataframe)
+        return FrameAssembler() if as_dataframe else ListAssembler()
+
+    raise ValueError(f"Layout '{layout}' not supported, use 'long' or 'wide'.")
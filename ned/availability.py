@@ -0,0 +1,255 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import json
+import os
+import threading
+import time
+
+from .helper import to_naive_utc
+
+
+def months_between(start_date: datetime, end_date: datetime) -> List[str]:
+    """
+    Function that returns the months touched by the period from start_date up to end_date.
+
+    Parameters:
+    start_date (datetime): The start of the period.
+    end_date (datetime): The (exclusive) end of the period.
+
+    Returns:
+    List[str]: The months as "YYYY-MM" strings.
+    """
+    year, month = start_date.year, start_date.month
+    last = end_date - timedelta(microseconds=1)
+    months = []
+
+    while (year, month) <= (last.year, last.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return months or [f"{start_date.year:04d}-{start_date.month:02d}"]
+
+
+def to_moment(moment: datetime) -> str:
+    return to_naive_utc(moment).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class AvailabilityIndex:
+    """
+    On-disk index of which series returned data, learned from the responses of the API.
+
+    A series is a combination of activity, classification, granularity, point and type. For
+    every series the index keeps the months that returned data, the requested windows that
+    came back empty after they had ended, and when the series was last found empty. NedAPI uses
+    the index to skip periods that are known to be empty, and to request series that
+    `is_valid_request` rejects but that have returned data before. A period is only known to
+    be empty when the empty windows cover all of it, so an empty result never hides days that
+    were not requested. Empty results are trusted for `reprobe_after`, after which they are
+    probed again. Timezone-aware dates are converted to UTC, naive dates are taken as UTC.
+
+    Parameters:
+    path (str, optional): The JSON file to persist the index in. If not provided, the index is kept in memory.
+    reprobe_after (timedelta, optional): How long an empty result is trusted. Defaults to 30 days.
+    probe_unknown (bool, optional): Whether to probe series that are unknown to the index and invalid according
+    to `is_valid_request`, so the index learns about them. Series that were found empty within `reprobe_after`
+    are not probed again. Defaults to False.
+    """
+
+    VERSION = 2
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        reprobe_after: timedelta = timedelta(days=30),
+        probe_unknown: bool = False,
+    ) -> None:
+        self._path = path
+        self._reprobe_after = reprobe_after.total_seconds()
+        self._probe_unknown = probe_unknown
+        self._series: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if path is not None and os.path.exists(path):
+            with open(path) as file:
+                stored = json.load(file)
+
+            if stored.get("version") == self.VERSION:
+                self._series = stored["series"]
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    @property
+    def probe_unknown(self) -> bool:
+        return self._probe_unknown
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    @staticmethod
+    def _key(
+        activity: int, classification: int, granularity: int, point: int, type: int
+    ) -> str:
+        return f"{activity}/{classification}/{granularity}/{point}/{type}"
+
+    def status(
+        self,
+        activity: int,
+        classification: int,
+        granularity: int,
+        point: int,
+        type: int,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Optional[bool]:
+        """
+        Function that returns what the index knows about a series in a period.
+
+        Parameters:
+        activity (int): The activity code.
+        classification (int): The classification code.
+        granularity (int): The granularity code.
+        point (int): The point code.
+        type (int): The type code.
+        start_date (datetime): The start of the period.
+        end_date (datetime): The (exclusive) end of the period.
+
+        Returns:
+        Optional[bool]: True if data is expected, False if the series is known to be empty, None if unknown.
+        """
+        key = self._key(activity, classification, granularity, point, type)
+        fresh_after = time.time() - self._reprobe_after
+        start_date, end_date = to_naive_utc(start_date), to_naive_utc(end_date)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+
+            if any(
+                month in series["months"]
+                for month in months_between(start_date, end_date)
+            ):
+                return True
+
+            # The union of the fresh empty windows must cover the whole period
+            covered_until = to_moment(start_date)
+            for start, end, recorded_at in sorted(series["empty"]):
+                if start > covered_until:
+                    break
+                if recorded_at > fresh_after:
+                    covered_until = max(covered_until, end)
+            if covered_until >= to_moment(end_date):
+                return False
+
+            if series["has_data"]:
+                return True
+
+        return None
+
+    def recently_empty(
+        self,
+        activity: int,
+        classification: int,
+        granularity: int,
+        point: int,
+        type: int,
+    ) -> bool:
+        """
+        Function that returns whether a series without data was found empty within `reprobe_after`.
+
+        Parameters:
+        activity (int): The activity code.
+        classification (int): The classification code.
+        granularity (int): The granularity code.
+        point (int): The point code.
+        type (int): The type code.
+
+        Returns:
+        bool: Whether the series never returned data and was recently found empty.
+        """
+        key = self._key(activity, classification, granularity, point, type)
+
+        with self._lock:
+            series = self._series.get(key)
+            return (
+                series is not None
+                and not series["has_data"]
+                and series["last_empty"] > time.time() - self._reprobe_after
+            )
+
+    def record(
+        self,
+        activity: int,
+        classification: int,
+        granularity: int,
+        point: int,
+        type: int,
+        start_date: datetime,
+        end_date: datetime,
+        has_data: bool,
+    ) -> None:
+        """
+        Function that records whether a series returned data in a period.
+
+        Windows that have not ended yet are only recorded when they returned data, an empty
+        result for them may just mean the data is not published yet.
+
+        Parameters:
+        activity (int): The activity code.
+        classification (int): The classification code.
+        granularity (int): The granularity code.
+        point (int): The point code.
+        type (int): The type code.
+        start_date (datetime): The start of the period.
+        end_date (datetime): The (exclusive) end of the period.
+        has_data (bool): Whether the API returned data for the period.
+        """
+        key = self._key(activity, classification, granularity, point, type)
+        now = time.time()
+        start_date, end_date = to_naive_utc(start_date), to_naive_utc(end_date)
+
+        with self._lock:
+            series = self._series.setdefault(
+                key, {"has_data": False, "last_empty": 0.0, "months": {}, "empty": []}
+            )
+
+            if has_data:
+                for month in months_between(start_date, end_date):
+                    series["months"][month] = now
+                series["has_data"] = True
+            else:
+                series["last_empty"] = now
+
+                if end_date <= to_naive_utc(datetime.now(timezone.utc)):
+                    # Expired windows are dropped, the others are kept with their own record time
+                    window = [to_moment(start_date), to_moment(end_date)]
+                    fresh_after = now - self._reprobe_after
+                    series["empty"] = [
+                        empty
+                        for empty in series["empty"]
+                        if empty[2] > fresh_after and empty[:2] != window
+                    ]
+                    series["empty"].append(window + [now])
+
+            self._dirty = True
+
+    def save(self) -> None:
+        """
+        Function that writes the index to its path, if it has one and it has changed.
+        """
+        if self._path is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+
+            temporary_path = f"{self._path}.tmp"
+            with open(temporary_path, "w") as file:
+                json.dump({"version": self.VERSION, "series": self._series}, file)
+            os.replace(temporary_path, self._path)
+
+            self._dirty = False
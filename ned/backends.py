@@ -0,0 +1,133 @@
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import polars as pl
+    import pyarrow as pa
+
+# Columns with a few distinct values, stored dictionary-encoded
+DICTIONARY_COLUMNS: List[str] = [
+    "point",
+    "type",
+    "granularity",
+    "granularitytimezone",
+    "activity",
+    "classification",
+]
+
+TIMESTAMP_COLUMNS: List[str] = ["validfrom", "validto", "lastupdate"]
+
+FLOAT_COLUMNS: List[str] = [
+    "capacity",
+    "volume",
+    "percentage",
+    "emission",
+    "emissionfactor",
+]
+
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError(
+            "The arrow and polars backends require pyarrow, install it with `pip install ned-py[arrow]`."
+        )
+    return pa
+
+
+def batch_to_arrow(response: List[dict]) -> "pa.RecordBatch":
+    """
+    Function that converts a batch of the API to an Arrow record batch, column by column.
+
+    The point, type and other metadata columns are dictionary-encoded, the validfrom, validto
+    and lastupdate columns are converted to UTC timestamps and the value columns to floats.
+
+    Parameters:
+    response (List[dict]): The batch.
+
+    Returns:
+    pa.RecordBatch: The batch as record batch.
+    """
+    pa = import_pyarrow()
+
+    names = list(response[0])
+    arrays = []
+
+    for name in names:
+        values = [item.get(name) for item in response]
+
+        if name in DICTIONARY_COLUMNS:
+            array = pa.array(values, pa.string()).dictionary_encode()
+        elif name in TIMESTAMP_COLUMNS:
+            array = pa.array(values, pa.string()).cast(pa.timestamp("s", "UTC"))
+        elif name in FLOAT_COLUMNS:
+            array = pa.array(values, pa.float64())
+        else:
+            array = pa.array(values)
+
+        arrays.append(array)
+
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+class ArrowAssembler:
+    """
+    Collects the batches yielded by the API into a single pyarrow.Table, without pandas.
+    """
+
+    def __init__(self) -> None:
+        import_pyarrow()
+        self._batches: List["pa.RecordBatch"] = []
+
+    def add(self, response: List[dict]) -> None:
+        if isinstance(response, list) and response:
+            self._batches.append(batch_to_arrow(response))
+
+    def result(self) -> Optional["pa.Table"]:
+        pa = import_pyarrow()
+
+        if not self._batches:
+            return None
+
+        tables = [pa.Table.from_batches([batch]) for batch in self._batches]
+        return pa.concat_tables(tables, promote_options="permissive").unify_dictionaries()
+
+
+class PolarsAssembler(ArrowAssembler):
+    """
+    Collects the batches yielded by the API into a single polars.DataFrame, through Arrow.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        try:
+            import polars  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "The polars backend requires polars, install it with `pip install ned-py[polars]`."
+            )
+
+    def result(self) -> Optional["pl.DataFrame"]:
+        import polars as pl
+
+        table = super().result()
+        return None if table is None else pl.from_arrow(table)
+
+
+BACKENDS: Dict[str, Callable[[], object]] = {
+    "arrow": ArrowAssembler,
+    "polars": PolarsAssembler,
+}
+
+
+def register_backend(name: str, factory: Callable[[], object]) -> None:
+    """
+    Function that registers a backend for the results of NedAPI.
+
+    Parameters:
+    name (str): The name to select the backend with, as `backend=name`.
+    factory (Callable[[], object]): Returns a new assembler, an object with an `add(response)` method that
+    is called with every batch (list of dicts) of the API and a `result()` method that returns the result.
+    """
+    BACKENDS[name] = factory
@@ -0,0 +1,194 @@
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Union
+import threading
+import time
+
+
+class Progress(NamedTuple):
+    completed: int
+    planned: int
+    requests: int
+    rows: int
+    elapsed: float
+    eta: Optional[float]
+
+
+class PartialList(list):
+    """
+    List of results that is returned when a fetch stopped before all units were requested.
+
+    Parameters:
+    data (List[dict]): The results fetched until the fetch stopped.
+    reason (str): Why the fetch stopped, "deadline", "max_requests" or "cancelled".
+    """
+
+    complete = False
+
+    def __init__(self, data: List[dict], reason: str) -> None:
+        super().__init__(data)
+        self.reason = reason
+
+
+class FetchBudget:
+    """
+    Keeps track of the progress of a fetch and of the budgets it may use.
+
+    Parameters:
+    planned (int): The number of units planned for the fetch.
+    deadline (Union[float, datetime], optional): Seconds from now, or the moment, at which to stop requesting. Defaults to None.
+    max_requests (int, optional): The maximum number of requests to send. Defaults to None.
+    on_progress (Callable[[Progress], None], optional): Called after every unit with the progress. Defaults to None.
+    cancel (threading.Event, optional): Stops the fetch before the next request when set. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        planned: int,
+        deadline: Optional[Union[float, datetime]] = None,
+        max_requests: Optional[int] = None,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        self._start = time.monotonic()
+
+        if isinstance(deadline, datetime):
+            now = datetime.now(deadline.tzinfo)
+            deadline = (deadline - now).total_seconds()
+
+        self._deadline = None if deadline is None else self._start + deadline
+        self._max_requests = max_requests
+        self._on_progress = on_progress
+        self._cancel = cancel
+        self._planned = planned
+        self._completed = 0
+        self._requests = 0
+        self._rows = 0
+        self._reason: Optional[str] = None
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason
+
+    @property
+    def deadline(self) -> Optional[float]:
+        # As time.monotonic() moment
+        return self._deadline
+
+    @property
+    def cancel(self) -> Optional[threading.Event]:
+        return self._cancel
+
+    def exhausted(self) -> Optional[str]:
+        """
+        Function that checks whether the fetch must stop, and remembers why.
+
+        Returns:
+        Optional[str]: "cancelled", "deadline" or "max_requests" if the fetch must stop, otherwise None.
+        """
+        if self._cancel is not None and self._cancel.is_set():
+            self._reason = "cancelled"
+        elif self._deadline is not None and time.monotonic() >= self._deadline:
+            self._reason = "deadline"
+        elif self._max_requests is not None and self._requests >= self._max_requests:
+            self._reason = "max_requests"
+
+        return self._reason
+
+    def requested(self) -> None:
+        self._requests += 1
+
+    def completed(self, rows: int) -> None:
+        """
+        Function that registers a completed (requested or skipped) unit and reports the progress.
+
+        Parameters:
+        rows (int): The number of rows the unit returned.
+        """
+        self._completed += 1
+        self._rows += rows
+
+        if self._on_progress is None:
+            return
+
+        elapsed = time.monotonic() - self._start
+        remaining = self._planned - self._completed
+        self._on_progress(
+            Progress(
+                self._completed,
+                self._planned,
+                self._requests,
+                self._rows,
+                elapsed,
+                elapsed / self._completed * remaining,
+            )
+        )
+
+
+def mark_incomplete(result, reason: str, as_dataframe: bool, backend: Optional[str] = None):
+    """
+    Function that marks the result of a fetch that stopped early as incomplete.
+
+    DataFrames get `attrs["complete"] = False` and `attrs["reason"]`, lists are returned as PartialList
+    and Arrow tables get "complete" and "reason" in their schema metadata. An empty result is returned
+    as an empty result of the requested output, so the type does not depend on whether the fetch stopped.
+
+    Parameters:
+    result (Union[pd.DataFrame, List[dict], pa.Table, pl.DataFrame, None]): The result fetched until the fetch stopped.
+    reason (str): Why the fetch stopped.
+    as_dataframe (bool): Whether an empty result should be returned as DataFrame.
+    backend (str, optional): The backend of the result, an empty result of "arrow" or "polars" is returned
+    as an empty table or DataFrame of that backend. Defaults to None.
+
+    Returns:
+    Union[pd.DataFrame, PartialList, pa.Table, pl.DataFrame]: The marked result.
+    """
+    if result is None:
+        if backend == "arrow":
+            from .backends import import_pyarrow
+
+            result = import_pyarrow().table({})
+        elif backend == "polars":
+            import polars as pl
+
+            result = pl.DataFrame()
+        elif as_dataframe:
+            import pandas as pd
+
+            result = pd.DataFrame()
+        else:
+            return PartialList([], reason)
+
+    if isinstance(result, list):
+        return PartialList(result, reason)
+
+    if hasattr(result, "replace_schema_metadata"):
+        metadata = dict(result.schema.metadata or {})
+        metadata.update({b"complete": b"false", b"reason": reason.encode()})
+        return result.replace_schema_metadata(metadata)
+
+    if not hasattr(result, "attrs"):
+        # polars DataFrames have no attrs of their own
+        result.attrs = {}
+
+    result.attrs["complete"] = False
+    result.attrs["reason"] = reason
+    return result
+
+
+def is_complete(result) -> bool:
+    """
+    Function that returns whether a result of NedAPI contains all planned units.
+
+    Parameters:
+    result (Union[pd.DataFrame, List[dict], pa.Table, pl.DataFrame, None]): The result.
+
+    Returns:
+    bool: False if the fetch stopped early because of a deadline, request budget or cancellation.
+    """
+    if isinstance(result, PartialList):
+        return False
+
+    if hasattr(result, "schema") and hasattr(result.schema, "metadata"):
+        return (result.schema.metadata or {}).get(b"complete") != b"false"
+
+    return getattr(result, "attrs", {}).get("complete", True)
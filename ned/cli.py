@@ -0,0 +1,46 @@
+from typing import List, Optional
+import argparse
+import json
+import os
+import sys
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Function that runs the `ned` command.
+
+    `ned serve --config ned.json` syncs the configured queries into a local store and serves
+    reads of the store over HTTP, see `ned.serve.serve` for the configuration. The API key can
+    also be given with the NED_API_KEY environment variable.
+
+    Parameters:
+    argv (List[str], optional): The arguments. Defaults to the arguments of the process.
+    """
+    parser = argparse.ArgumentParser(prog="ned")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser(
+        "serve", help="sync into a local store and serve it over HTTP"
+    )
+    serve_parser.add_argument("--config", required=True, help="JSON configuration file")
+    serve_parser.add_argument("--host", help="overrides the host of the configuration")
+    serve_parser.add_argument(
+        "--port", type=int, help="overrides the port of the configuration"
+    )
+
+    arguments = parser.parse_args(argv)
+
+    with open(arguments.config) as file:
+        config = json.load(file)
+
+    config.setdefault("api_key", os.environ.get("NED_API_KEY"))
+    if not config["api_key"]:
+        sys.exit("No api_key in the configuration and NED_API_KEY is not set.")
+
+    for name in ("host", "port"):
+        if getattr(arguments, name) is not None:
+            config[name] = getattr(arguments, name)
+
+    from .serve import serve
+
+    serve(config)
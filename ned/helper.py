@@ -1,4 +1,3 @@
-import pandas as pd
 import datetime as dt
 
 from typing import Generator, Tuple, List
@@ -40,6 +39,21 @@ INVALID_10_MINUTES_TYPES: List = [
 ]
 
 
+def to_naive_utc(moment: dt.datetime) -> dt.datetime:
+    """
+    Function that converts a timezone-aware moment to naive UTC, naive moments are returned as they are.
+
+    Parameters:
+    moment (dt.datetime): The moment, e.g. a datetime or pandas Timestamp.
+
+    Returns:
+    dt.datetime: The moment without timezone.
+    """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(dt.timezone.utc).replace(tzinfo=None)
+
+
 def generate_loop(
     start_date: dt.datetime, end_date: dt.datetime, timed_maximum_days: int
 ) -> Generator[Tuple[dt.datetime, dt.datetime], None, None]:
@@ -55,16 +69,17 @@ def generate_loop(
     Tuple[dt.datetime, dt.datetime]: A tuple with the current date and the until date
     """
     current_date = start_date
+    step = dt.timedelta(days=timed_maximum_days)
 
     while current_date < end_date:
-        if current_date + pd.Timedelta(f"{timed_maximum_days} days") > end_date:
+        if current_date + step > end_date:
             until_date = end_date
         else:
-            until_date = current_date + pd.Timedelta(f"{timed_maximum_days} days")
+            until_date = current_date + step
 
         yield (current_date, until_date)
 
-        current_date += pd.Timedelta(f"{timed_maximum_days} days")
+        current_date += step
 
 
 def is_valid_request(
@@ -151,3 +166,26 @@ def is_valid_request(
             return True
 
     return False
+
+
+def merge_periods(
+    periods: List[Tuple[dt.datetime, dt.datetime]]
+) -> List[Tuple[dt.datetime, dt.datetime]]:
+    """
+    Function that merges overlapping or adjacent periods
+
+    Parameters:
+    periods (List[Tuple[dt.datetime, dt.datetime]]): The periods as (start, end) tuples
+
+    Returns:
+    List[Tuple[dt.datetime, dt.datetime]]: The merged periods, sorted by start
+    """
+    merged = []
+
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
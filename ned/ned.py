@@ -1,13 +1,33 @@
 from requests.exceptions import ChunkedEncodingError
-from typing import List, Union, Optional, Dict, Generator
-from datetime import datetime, timedelta
+from typing import (
+    Callable,
+    List,
+    Union,
+    Optional,
+    Dict,
+    Generator,
+    NamedTuple,
+    Tuple,
+    TYPE_CHECKING,
+)
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from simplejson.errors import JSONDecodeError
+import inspect
 import logging
+import threading
 import requests
-import pandas as pd
 import json
-import time
-from .helper import generate_loop, is_valid_request
+from .helper import generate_loop, is_valid_request, merge_periods, to_naive_utc
+from .assembly import ChunkedResult, get_assembler
+from .scheduler import Scheduler, priority_code
+from .pool import NedPool
+from .availability import AvailabilityIndex
+from .vintage import ForecastVintageStore
+from .store import LocalStore
+from .snapshot import load_snapshot, write_snapshot
+from .budget import FetchBudget, PartialList, Progress, is_complete, mark_incomplete
 
 from .metadata import (
     NED_ACTIVITIES,
@@ -21,8 +41,110 @@ from .metadata import (
     NED_POINTS_PROVINCES,
 )
 
+if TYPE_CHECKING:
+    # pandas is only imported when a DataFrame is requested, to keep `import ned` fast
+    import pandas as pd
+    import polars as pl
+    import pyarrow as pa
+
+
+TIMED_DAYS: Dict[int, int] = {
+    NED_GRANULARITIES["10 minutes"]: 1,
+    NED_GRANULARITIES["15 minutes"]: 1,
+    NED_GRANULARITIES["Hour"]: 5,
+    NED_GRANULARITIES["Day"]: 30,
+    NED_GRANULARITIES["Month"]: 365,
+    NED_GRANULARITIES["Year"]: 365 * 10,
+}
+
+# The classification and activity of the get_* functions that can be used in get_many
+QUERY_FUNCTIONS: Dict[str, Optional[Tuple[str, str]]] = {
+    "get_request": None,
+    "get_consumption": ("Current", "Consuming"),
+    "get_forecast": ("Forecast", "Providing"),
+    "get_production": ("Current", "Providing"),
+    "get_production_provinces": ("Current", "Providing"),
+    "get_production_offshore": ("Current", "Providing"),
+    "get_production_netherlands": ("Current", "Providing"),
+}
+
+
+class _Unit(NamedTuple):
+    activity: int
+    classification: int
+    granularity: int
+    granularitytimezone: int
+    point: int
+    type: int
+    start_date: datetime
+    end_date: datetime
+
+    def params(self, items_per_page: int) -> Dict[str, Union[int, str]]:
+        return {
+            "itemsPerPage": items_per_page,
+            "point": self.point,
+            "type": self.type,
+            "classification": self.classification,
+            "granularity": self.granularity,
+            "granularitytimezone": self.granularitytimezone,
+            "activity": self.activity,
+            "validfrom[strictly_before]": self.end_date.strftime("%Y-%m-%d"),
+            "validfrom[after]": self.start_date.strftime("%Y-%m-%d"),
+        }
+
+
+# Properties that are always requested when only some properties are requested
+REQUIRED_PROPERTIES: List[str] = ["point", "type", "validfrom"]
+
+
+@lru_cache(maxsize=None)
+def _accept_encoding() -> str:
+    # urllib3 only decodes brotli when one of the brotli packages is installed, checked once
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "br, gzip, deflate"
+        except ImportError:
+            pass
+    return "gzip, deflate"
+
+
+class _CallOptions(NamedTuple):
+    as_dataframe: bool
+    pretty_print: bool
+    force_invalid_request: bool
+    sleep_time: float
+    properties: Optional[Tuple[str, ...]] = None
+    compression: bool = True
+    priority: str = "normal"
+
 
 class NedAPI:
+    """
+    Client for the API of the Nationaal Energie Dashboard.
+
+    A single instance can be shared between threads. The settings passed to the constructor
+    (or changed through the properties) are the defaults for every call, and `as_dataframe`,
+    `pretty_print`, `force_invalid_request` and `sleep_time` can be overridden per call
+    instead of by changing the instance. All threads share the HTTP connection pool of the
+    instance and the `sleep_time` spacing between requested time windows. The `log_level`
+    applies to the `ned` logger and therefore to every instance.
+
+    Requests for utilizations can be limited to the `properties` in use, with the API-Platform
+    properties filter, and are compressed unless `compression` is turned off. See `transfer_stats`
+    for the bytes received and saved.
+
+    Every fetch is a job of the scheduler of the instance. Requests of a higher `priority`
+    ("interactive", "normal" or "background") are sent before queued requests of lower
+    priorities, and jobs of the same priority take turns, see `Scheduler`.
+
+    Instances created with an `availability` index skip series that are known to be empty and
+    request series that returned data before, see `AvailabilityIndex`.
+
+    Instances created with a `pool` share the connections and the rate budgets of that pool with
+    all other instances registered to it, see `NedPool`.
+    """
+
     logging.basicConfig(level=logging.INFO, format="%(levelname)s:NedAPI:%(message)s")
 
     API_URL = "https://api.ned.nl/v1"
@@ -36,13 +158,40 @@ class NedAPI:
         as_dataframe: bool = False,
         pretty_print: bool = False,
         sleep_time: float = 0.5,
+        pool: Optional[NedPool] = None,
+        availability: Optional[AvailabilityIndex] = None,
+        properties: Optional[List[str]] = None,
+        compression: bool = True,
+        priority: str = "normal",
     ) -> None:
+        priority_code(priority)
+
         self._api_key = api_key
         self._log_level = log_level
         self._force_invalid_request = force_invalid_request
         self._as_dataframe = as_dataframe
         self._pretty_print = pretty_print
         self._sleep_time = sleep_time
+        self._properties = properties or []
+        self._compression = compression
+        self._priority = priority
+
+        self._pool = pool
+        self._availability = availability
+        self._session = requests.Session() if pool is None else pool.session
+        self._scheduler = Scheduler()
+        self._in_flight: Dict[tuple, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self._transfer = {
+            "requests": 0,
+            "wire_bytes": 0,
+            "decoded_bytes": 0,
+            "ignored_properties": 0,
+        }
+        self._transfer_lock = threading.Lock()
+
+        if pool is not None:
+            pool.register(self)
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(self._log_level)
@@ -61,6 +210,14 @@ class NedAPI:
     def api_key(self) -> str:
         return self._api_key
 
+    @property
+    def pool(self) -> Optional[NedPool]:
+        return self._pool
+
+    @property
+    def availability(self) -> Optional[AvailabilityIndex]:
+        return self._availability
+
     @property
     def force_invalid_request(self) -> bool:
         return self._force_invalid_request
@@ -93,30 +250,124 @@ class NedAPI:
     def sleep_time(self, new_value: float) -> None:
         self._sleep_time = new_value
 
-    def _format_results(self, results: dict) -> Union[pd.DataFrame, dict]:
+    @property
+    def properties(self) -> List[str]:
+        return self._properties
+
+    @properties.setter
+    def properties(self, new_value: Optional[List[str]]) -> None:
+        self._properties = new_value or []
+
+    @property
+    def compression(self) -> bool:
+        return self._compression
+
+    @compression.setter
+    def compression(self, new_value: bool) -> None:
+        self._compression = new_value
+
+    @property
+    def priority(self) -> str:
+        return self._priority
+
+    @priority.setter
+    def priority(self, new_value: str) -> None:
+        priority_code(new_value)
+        self._priority = new_value
+
+    @property
+    def scheduler(self) -> Scheduler:
+        return self._scheduler
+
+    @property
+    def transfer_stats(self) -> Dict[str, int]:
+        """
+        The number of requests, the bytes received over the wire and after decompression, the bytes saved by
+        compression and the number of responses in which the server ignored the requested properties.
+        """
+        with self._transfer_lock:
+            stats = dict(self._transfer)
+
+        stats["saved_bytes"] = stats["decoded_bytes"] - stats["wire_bytes"]
+        return stats
+
+    def _options(
+        self,
+        as_dataframe: Optional[bool] = None,
+        pretty_print: Optional[bool] = None,
+        force_invalid_request: Optional[bool] = None,
+        sleep_time: Optional[float] = None,
+        properties: Optional[List[str]] = None,
+        compression: Optional[bool] = None,
+        priority: Optional[str] = None,
+    ) -> _CallOptions:
+        """
+        Function that resolves the options for a single call, falling back to the instance settings.
+
+        The options are resolved once at the start of a call, so changing the instance settings
+        while the call is running does not affect it.
+
+        Returns:
+        _CallOptions: The options for the call.
+        """
+        if priority is not None:
+            priority_code(priority)
+
+        return _CallOptions(
+            self._as_dataframe if as_dataframe is None else as_dataframe,
+            self._pretty_print if pretty_print is None else pretty_print,
+            self._force_invalid_request
+            if force_invalid_request is None
+            else force_invalid_request,
+            self._sleep_time if sleep_time is None else sleep_time,
+            tuple(self._properties if properties is None else properties) or None,
+            self._compression if compression is None else compression,
+            self._priority if priority is None else priority,
+        )
+
+    def _format_results(
+        self, results: dict, options: Optional[_CallOptions] = None
+    ) -> Union["pd.DataFrame", dict]:
         """
         Function that formats the results from the API request.
 
         Parameters:
         results (dict): The results from the API request.
+        options (_CallOptions, optional): The options for the call. Defaults to the instance settings.
 
         Returns:
-        Union[pd.DataFrame, dict]: A DataFrame or dict containing the parsed results.
+        Union["pd.DataFrame", dict]: A DataFrame or dict containing the parsed results.
         """
+        options = options or self._options()
+
+        if options.as_dataframe:
+            import pandas as pd
 
-        if self._as_dataframe:
             return pd.DataFrame(results)
         else:
             return results
 
-    def authorisations(self) -> Union[pd.DataFrame, dict]:
-        return self._format_results(self._do_api_request("authorisations"))
+    def authorisations(
+        self, as_dataframe: Optional[bool] = None, pretty_print: Optional[bool] = None
+    ) -> Union["pd.DataFrame", dict]:
+        options = self._options(as_dataframe, pretty_print)
+        return self._format_results(
+            self._do_api_request("authorisations", options=options), options
+        )
 
-    def users(self) -> Union[pd.DataFrame, dict]:
-        return self._format_results(self._do_api_request("users"))
+    def users(
+        self, as_dataframe: Optional[bool] = None, pretty_print: Optional[bool] = None
+    ) -> Union["pd.DataFrame", dict]:
+        options = self._options(as_dataframe, pretty_print)
+        return self._format_results(
+            self._do_api_request("users", options=options), options
+        )
 
     def _do_api_request(
-        self, endpoint: str, params: Optional[Dict[str, str]] = None
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, str]] = None,
+        options: Optional[_CallOptions] = None,
     ) -> dict:
         """
         Function that does the actual API request.
@@ -124,48 +375,171 @@ class NedAPI:
         Parameters:
         endpoint (str): The endpoint to request.
         params (Dict[str, str], optional): The parameters to pass to the request. Defaults to None.
+        options (_CallOptions, optional): The options for the call. Defaults to the instance settings.
 
         Returns:
-        Union[pd.DataFrame, dict]: A DataFrame or dict containing the response from request.
+        Union["pd.DataFrame", dict]: A DataFrame or dict containing the response from request.
         """
 
-        headers = {"X-AUTH-TOKEN": self._api_key, "accept": "application/ld+json"}
+        response = self._request(endpoint, params, options)
+        return [] if response is None else response
+
+    def _get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, str]] = None,
+        options: Optional[_CallOptions] = None,
+        budget: Optional[FetchBudget] = None,
+    ) -> Optional[Union[List[dict], dict]]:
+        """
+        Function that sends a request to the API and returns the decoded JSON-LD document.
+
+        Parameters:
+        endpoint (str): The endpoint to request.
+        params (Dict[str, str], optional): The parameters to pass to the request. Defaults to None.
+        options (_CallOptions, optional): The options for the call. Defaults to the instance settings.
+        budget (FetchBudget, optional): The budget of the fetch, whose deadline and cancel stop the wait for a
+        slot of the pool. Defaults to None.
+
+        Returns:
+        Optional[Union[List[dict], dict]]: The document, or None if it could not be decoded or the budget ran
+        out while waiting for a slot.
+        """
+        options = options or self._options()
+        headers = {
+            "X-AUTH-TOKEN": self._api_key,
+            "accept": "application/ld+json",
+            "Accept-Encoding": _accept_encoding() if options.compression else "identity",
+        }
+
+        if self._pool is not None:
+            # Wait for a slot in the rate budgets shared with the other instances of the pool
+            waited = self._pool.acquire(
+                self,
+                self._api_key,
+                options.priority,
+                None if budget is None else budget.deadline,
+                None if budget is None else budget.cancel,
+            )
+            if waited is None:
+                return None
 
         try:
-            response = requests.get(
+            response = self._session.get(
                 f"{self.API_URL}/{endpoint}", headers=headers, params=params
             )
         except ChunkedEncodingError as ex:
             # Could not decode the chunked encoding, try again
-            return self._do_api_request(endpoint, params)
+            return self._get(endpoint, params, options, budget)
 
         self.logger.debug(json.dumps(params, indent=4))
+        self._count_transfer(response)
 
         try:
-            if "hydra:member" in response.json():
-                response = response.json()["hydra:member"]
-            else:
-                response = response.json()
+            return response.json()
         except JSONDecodeError:
             self.logger.error(f"Error decoding JSON response: {response.text}")
             self.logger.info(f"For request: ", json.dumps(params, indent=4))
-            return []
+            return None
+
+    def _request(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, str]] = None,
+        options: Optional[_CallOptions] = None,
+        budget: Optional[FetchBudget] = None,
+    ) -> Optional[Union[List[dict], dict]]:
+        """
+        Function that does the actual API request, like _do_api_request but returns None on errors.
+
+        This allows callers to tell an empty result apart from a failed request.
+
+        Parameters:
+        endpoint (str): The endpoint to request.
+        params (Dict[str, str], optional): The parameters to pass to the request. Defaults to None.
+        options (_CallOptions, optional): The options for the call. Defaults to the instance settings.
+        budget (FetchBudget, optional): The budget of the fetch, see _get. Defaults to None.
+
+        Returns:
+        Optional[Union[List[dict], dict]]: The converted response, or None if the request failed.
+        """
+        options = options or self._options()
+        response = self._get(endpoint, params, options, budget)
+
+        if response is None:
+            return None
+
+        if "hydra:member" in response:
+            response = response["hydra:member"]
 
         # if response is not a list, check for errors
         if not isinstance(response, list) and "hydra:description" in response:
             self.logger.info(
                 f"{response['hydra:title']}: {response['hydra:description']}"
             )
-            return []
+            return None
 
         # Transform the keys in the response to human-readable values
         data = self._convert_api_values(response)
 
-        if self._pretty_print:
+        if options.pretty_print:
             print(json.dumps(data, indent=4))
 
         return response
 
+    def _count_transfer(self, response: requests.Response) -> None:
+        """
+        Function that adds the bytes received for a response to the transfer statistics.
+
+        Parameters:
+        response (requests.Response): The response.
+        """
+        decoded = len(response.content)
+
+        try:
+            # The number of bytes read from the connection, before decompression
+            wire = response.raw.tell() or decoded
+        except AttributeError:
+            wire = decoded
+
+        self.logger.debug(
+            f"Received {wire} bytes ({response.headers.get('Content-Encoding', 'identity')}), {decoded} bytes decoded."
+        )
+
+        with self._transfer_lock:
+            self._transfer["requests"] += 1
+            self._transfer["wire_bytes"] += wire
+            self._transfer["decoded_bytes"] += decoded
+
+    def _select_properties(
+        self, response: List[dict], properties: List[str]
+    ) -> List[dict]:
+        """
+        Function that keeps only the requested properties, for servers that ignore the properties filter.
+
+        Parameters:
+        response (List[dict]): The converted response.
+        properties (List[str]): The requested properties.
+
+        Returns:
+        List[dict]: The response with only the requested properties, and @id and @type.
+        """
+        keep = set(properties) | {"@id", "@type"}
+
+        if not response or set(response[0]) <= keep:
+            return response
+
+        with self._transfer_lock:
+            self._transfer["ignored_properties"] += 1
+            first = self._transfer["ignored_properties"] == 1
+
+        if first:
+            self.logger.info(
+                "The server ignored the properties filter, removing the other properties locally."
+            )
+
+        return [{key: value for key, value in item.items() if key in keep} for item in response]
+
     def _convert_api_values(self, response) -> List[dict]:
         """
         Function that converts the values from the API to human-readable values.
@@ -231,7 +605,76 @@ class NedAPI:
             validated_codes.append(value_code)
         return validated_codes
 
-    def _timed_fetch(
+    def _should_request(
+        self,
+        activity: int,
+        classification: int,
+        granularity: int,
+        point: int,
+        type: int,
+        start_date: datetime,
+        end_date: datetime,
+        options: _CallOptions,
+    ) -> bool:
+        """
+        Function that decides whether a series should be requested for a period.
+
+        What the availability index has learned takes precedence over `is_valid_request`.
+
+        Parameters:
+        activity (int): The activity code.
+        classification (int): The classification code.
+        granularity (int): The granularity code.
+        point (int): The point code.
+        type (int): The type code.
+        start_date (datetime): The start of the period.
+        end_date (datetime): The end of the period.
+        options (_CallOptions): The options for the call.
+
+        Returns:
+        bool: Whether the series should be requested.
+        """
+        series = f"{NED_POINTS.inverse[point]} - {NED_TYPES.inverse[type]}"
+
+        if self._availability is not None:
+            known = self._availability.status(
+                activity,
+                classification,
+                granularity,
+                point,
+                type,
+                start_date,
+                end_date,
+            )
+
+            if known is not None:
+                self.logger.debug(
+                    f"{'Requesting' if known else 'Skipping'} {series}, known to be {'available' if known else 'empty'}."
+                )
+                return known
+
+        if is_valid_request(activity, classification, granularity, point, type):
+            self.logger.debug(f"Valid request for {series}.")
+            return True
+
+        if options.force_invalid_request:
+            self.logger.debug(f"Forcing invalid request for {series}.")
+            return True
+
+        if (
+            self._availability is not None
+            and self._availability.probe_unknown
+            and not self._availability.recently_empty(
+                activity, classification, granularity, point, type
+            )
+        ):
+            self.logger.debug(f"Probing invalid request for {series}, unknown to the index.")
+            return True
+
+        self.logger.debug(f"Not forcing invalid request for {series}.")
+        return False
+
+    def _plan(
         self,
         granularity: int,
         start_date: datetime,
@@ -241,9 +684,9 @@ class NedAPI:
         classification: int,
         activity: int,
         granularitytimezone: int,
-    ) -> Generator[Dict[str, int], None, None]:
+    ) -> List[_Unit]:
         """
-        Functions that yields the response from the API request.
+        Function that splits a request into the units that are requested from the API, one per time window, point and type.
 
         Parameters:
         granularity (int): The granularity of the time.
@@ -256,17 +699,10 @@ class NedAPI:
         granularitytimezone (int): The timezone for the granularity.
 
         Returns:
-        A list of dicts containing the response from request.
+        List[_Unit]: The units, ordered by time window.
         """
 
-        timed_days = {
-            NED_GRANULARITIES["10 minutes"]: 1,
-            NED_GRANULARITIES["15 minutes"]: 1,
-            NED_GRANULARITIES["Hour"]: 5,
-            NED_GRANULARITIES["Day"]: 30,
-            NED_GRANULARITIES["Month"]: 365,
-            NED_GRANULARITIES["Year"]: 365 * 10,
-        }.get(granularity, None)
+        timed_days = TIMED_DAYS.get(granularity, None)
 
         if timed_days is None:
             raise ValueError(f"Granularity {granularity} not supported.")
@@ -274,69 +710,242 @@ class NedAPI:
         if end_date is None:
             end_date = start_date + timedelta(days=timed_days)
 
-        for current_date, end_date in generate_loop(start_date, end_date, timed_days):
-            for point in points:
-                # Check if is valid request
-                for type in types:
-                    if not is_valid_request(
-                        activity, classification, granularity, point, type
-                    ):
-                        if not self._force_invalid_request:
-                            self.logger.debug(
-                                f"Not forcing invalid request for {NED_POINTS.inverse[point]} - {NED_TYPES.inverse[type]}."
-                            )
-                            continue
-                        else:
-                            self.logger.debug(
-                                f"Forcing invalid request for {NED_POINTS.inverse[point]} - {NED_TYPES.inverse[type]}."
-                            )
-                    else:
-                        self.logger.debug(
-                            f"Valid request for {NED_POINTS.inverse[point]} - {NED_TYPES.inverse[type]}."
-                        )
-
-                    params = {
-                        "itemsPerPage": self.MAX_ITEMS_PER_PAGE,
-                        "point": point,
-                        "type": type,
-                        "classification": classification,
-                        "granularity": granularity,
-                        "granularitytimezone": granularitytimezone,
-                        "activity": activity,
-                        "validfrom[strictly_before]": end_date.strftime("%Y-%m-%d"),
-                        "validfrom[after]": current_date.strftime("%Y-%m-%d"),
-                    }
-
-                    response = self._do_api_request("utilizations", params)
-
-                    if response is not None:
-                        self.logger.debug(
-                            json.dumps(
-                                {
-                                    "granularity": NED_GRANULARITIES.inverse[
-                                        granularity
-                                    ],
-                                    "number_of_results": len(response),
-                                    "activity": NED_ACTIVITIES.inverse[activity],
-                                    "classification": NED_CLASSIFICATIONS.inverse[
-                                        classification
-                                    ],
-                                    "point": NED_POINTS.inverse[point],
-                                    "type": NED_TYPES.inverse[type],
-                                    "from": current_date.strftime("%Y-%m-%d"),
-                                    "to": end_date.strftime("%Y-%m-%d"),
-                                },
-                                indent=4,
-                            )
-                        )
-
-                    yield response
-
-            # Sleep for self._sleep_time seconds to avoid rate limiting
-            self.logger.debug(
-                f"Sleeping for {self._sleep_time} seconds to avoid API rate limits."
+        return [
+            _Unit(
+                activity,
+                classification,
+                granularity,
+                granularitytimezone,
+                point,
+                type,
+                current_date,
+                until_date,
             )
-            time.sleep(self._sleep_time)
+            for current_date, until_date in generate_loop(
+                start_date, end_date, timed_days
+            )
+            for point in points
+            for type in types
+        ]
+
+    def _fetch_units(
+        self,
+        units: List[_Unit],
+        options: _CallOptions,
+        budget: Optional[FetchBudget] = None,
+    ) -> Generator[Tuple[_Unit, List[dict]], None, None]:
+        """
+        Functions that yields the response from the API request for every unit that should be requested.
+
+        Parameters:
+        units (List[_Unit]): The units to request, ordered by time window.
+        options (_CallOptions): The options for the call.
+        budget (FetchBudget, optional): The budget of the fetch, stops yielding when it is exhausted. Defaults to None.
+
+        Yields:
+        Tuple[_Unit, List[dict]]: The unit and the response from the request.
+        """
+        window = None
+        job = object()
+
+        for unit in units:
+            if budget is not None and budget.exhausted():
+                self.logger.warning(
+                    f"Stopped fetching because of {budget.reason}, the result is incomplete."
+                )
+                return
+
+            # Check if is valid request
+            if not self._should_request(
+                unit.activity,
+                unit.classification,
+                unit.granularity,
+                unit.point,
+                unit.type,
+                unit.start_date,
+                unit.end_date,
+                options,
+            ):
+                if budget is not None:
+                    budget.completed(0)
+                continue
+
+            # Wait for the turn of the job, and for the next free slot of the instance when the
+            # time window changes to avoid rate limiting
+            new_window = (unit.start_date, unit.end_date) != window
+            window = (unit.start_date, unit.end_date)
+            waited = self._scheduler.acquire(
+                job,
+                options.priority,
+                new_window,
+                options.sleep_time,
+                None if budget is None else budget.deadline,
+                None if budget is None else budget.cancel,
+            )
+            if waited is not None and waited > 0:
+                self.logger.debug(
+                    f"Waited {waited:.2f} seconds for the scheduler to avoid API rate limits."
+                )
+
+            # The budget may have run out while waiting for a slot, which stops the wait
+            if budget is not None:
+                if budget.exhausted():
+                    self.logger.warning(
+                        f"Stopped fetching because of {budget.reason}, the result is incomplete."
+                    )
+                    return
+                budget.requested()
+
+            params = unit.params(self.MAX_ITEMS_PER_PAGE)
+            if options.properties is not None:
+                params["properties[]"] = sorted(
+                    set(options.properties) | set(REQUIRED_PROPERTIES)
+                )
+
+            response = self._coalesced_request("utilizations", params, options, budget)
+
+            if response is None and budget is not None and budget.exhausted():
+                # Stopped while waiting for a slot of the pool, the unit was not requested
+                self.logger.warning(
+                    f"Stopped fetching because of {budget.reason}, the result is incomplete."
+                )
+                return
+
+            if response is not None and options.properties is not None:
+                response = self._select_properties(response, params["properties[]"])
+
+            if response is not None:
+                if self._availability is not None:
+                    self._availability.record(
+                        unit.activity,
+                        unit.classification,
+                        unit.granularity,
+                        unit.point,
+                        unit.type,
+                        unit.start_date,
+                        unit.end_date,
+                        len(response) > 0,
+                    )
+
+                self.logger.debug(
+                    json.dumps(
+                        {
+                            "granularity": NED_GRANULARITIES.inverse[unit.granularity],
+                            "number_of_results": len(response),
+                            "activity": NED_ACTIVITIES.inverse[unit.activity],
+                            "classification": NED_CLASSIFICATIONS.inverse[
+                                unit.classification
+                            ],
+                            "point": NED_POINTS.inverse[unit.point],
+                            "type": NED_TYPES.inverse[unit.type],
+                            "from": unit.start_date.strftime("%Y-%m-%d"),
+                            "to": unit.end_date.strftime("%Y-%m-%d"),
+                        },
+                        indent=4,
+                    )
+                )
+
+            response = [] if response is None else response
+
+            if budget is not None:
+                budget.completed(len(response))
+
+            yield unit, response
+
+    def _coalesced_request(
+        self,
+        endpoint: str,
+        params: Dict[str, str],
+        options: _CallOptions,
+        budget: Optional[FetchBudget] = None,
+    ) -> Optional[List[dict]]:
+        """
+        Function that does the API request, sharing the result with identical requests of other threads that are in flight.
+
+        Parameters:
+        endpoint (str): The endpoint to request.
+        params (Dict[str, str]): The parameters to pass to the request.
+        options (_CallOptions): The options for the call.
+        budget (FetchBudget, optional): The budget of the fetch, see _get. Defaults to None.
+
+        Returns:
+        Optional[List[dict]]: The converted response, or None if the request failed.
+        """
+        key = (
+            endpoint,
+            tuple(
+                sorted(
+                    (name, tuple(value) if isinstance(value, list) else value)
+                    for name, value in params.items()
+                )
+            ),
+        )
+
+        with self._in_flight_lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = Future()
+
+        if not leader:
+            self.logger.debug(f"Joining request in flight for {json.dumps(params)}.")
+            response = flight.result()
+            return None if response is None else list(response)
+
+        try:
+            response = self._request(endpoint, params, options, budget)
+            flight.set_result(response)
+        except BaseException as ex:
+            flight.set_exception(ex)
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+
+        return response
+
+    def _timed_fetch(
+        self,
+        granularity: int,
+        start_date: datetime,
+        end_date: Optional[datetime],
+        types: List[int],
+        points: List[int],
+        classification: int,
+        activity: int,
+        granularitytimezone: int,
+        options: Optional[_CallOptions] = None,
+    ) -> Generator[Dict[str, int], None, None]:
+        """
+        Functions that yields the response from the API request.
+
+        Parameters:
+        granularity (int): The granularity of the time.
+        start_date (datetime): The start date for the request.
+        end_date (datetime, optional): The end date for the request. If not provided, defaults to None.
+        types (List[int]): Types to retrieve as list of integers.
+        points (List[int]): Points to retrieve as list of integers.
+        classification (int): The classification of the data.
+        activity (int): The activity type of the data.
+        granularitytimezone (int): The timezone for the granularity.
+        options (_CallOptions, optional): The options for the call. Defaults to the instance settings.
+
+        Returns:
+        A list of dicts containing the response from request.
+        """
+        units = self._plan(
+            granularity,
+            start_date,
+            end_date,
+            types,
+            points,
+            classification,
+            activity,
+            granularitytimezone,
+        )
+
+        for _, response in self._fetch_units(units, options or self._options()):
+            yield response
 
     def get_backcast(self):
         """
@@ -358,7 +967,23 @@ class NedAPI:
         granularitytimezone: str = "CET (Central European Time)",
         types: Optional[List[str]] = None,
         points: Optional[List[str]] = None,
-    ) -> Union[pd.DataFrame, List[dict]]:
+        layout: str = "long",
+        value: str = "volume",
+        dtype: str = "float64",
+        as_dataframe: Optional[bool] = None,
+        pretty_print: Optional[bool] = None,
+        force_invalid_request: Optional[bool] = None,
+        sleep_time: Optional[float] = None,
+        properties: Optional[List[str]] = None,
+        compression: Optional[bool] = None,
+        deadline: Optional[Union[float, datetime]] = None,
+        max_requests: Optional[int] = None,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        max_memory: Optional[int] = None,
+        backend: Optional[str] = None,
+        priority: Optional[str] = None,
+    ) -> Union["pd.DataFrame", List[dict], ChunkedResult, "pa.Table", "pl.DataFrame"]:
         """
         Function that does the request and parses the response, can be called directly or by its sub functions.
 
@@ -371,14 +996,50 @@ class NedAPI:
         granularitytimezone (str, optional): The timezone for the granularity. Defaults to "CET (Central European Time)".
         types (List[str], optional): Types to retrieve as list of strings. If not provided, defaults to None.
         points (List[str], optional): Points to retrieve as list of strings. If not provided, defaults to None.
+        layout (str, optional): "long" for one row per point/type/timestamp, "wide" for a DataFrame with the
+        validfrom timestamps as index and a (point, type) column per series. Defaults to "long".
+        value (str, optional): The column to use as value for the wide layout. Defaults to "volume".
+        dtype (str, optional): The dtype of the wide layout, "float32" or "float64". Defaults to "float64".
+        as_dataframe (bool, optional): Overrides the as_dataframe attribute for this call.
+        pretty_print (bool, optional): Overrides the pretty_print attribute for this call.
+        force_invalid_request (bool, optional): Overrides the force_invalid_request attribute for this call.
+        sleep_time (float, optional): Overrides the sleep_time attribute for this call.
+        properties (List[str], optional): Overrides the properties attribute for this call, an empty list requests
+        all properties.
+        compression (bool, optional): Overrides the compression attribute for this call.
+        deadline (Union[float, datetime], optional): Seconds from now, or the moment, after which no new requests are sent.
+        max_requests (int, optional): The maximum number of requests to send.
+        on_progress (Callable[[Progress], None], optional): Called after every unit (time window, point and type)
+        with the completed and planned units, requests, rows, elapsed seconds and estimated seconds remaining.
+        cancel (threading.Event, optional): Set the event from another thread to stop before the next request.
+        max_memory (int, optional): The number of bytes of fetched rows to keep in memory. Above it, the rows are
+        spilled to temporary Arrow IPC files and a ChunkedResult is returned. Requires pyarrow.
+        backend (str, optional): "list", "pandas", "arrow" for a pyarrow.Table, "polars" for a polars.DataFrame,
+        or a backend registered with `ned.register_backend`. Overrides as_dataframe for the long layout.
+        priority (str, optional): Overrides the priority attribute for this call, "interactive", "normal" or "background".
 
         Returns:
-        Union[pd.DataFrame, List[dict]]: A DataFrame or list of dicts containing the response from request.
-        Behaviour is based on as_dataframe attribute.
+        Union["pd.DataFrame", List[dict], ChunkedResult]: A DataFrame or list of dicts containing the response from request.
+        Behaviour is based on as_dataframe, the wide layout is always returned as a DataFrame.
+        With max_memory a ChunkedResult is returned, which yields DataFrames or lists of dicts per chunk.
+        With a backend, the result of that backend is returned.
+        When the deadline, max_requests or cancel stopped the request, the results fetched until then are
+        returned and marked as incomplete, check with `ned.is_complete`.
         """
-        data = None
+        options = self._options(
+            as_dataframe,
+            pretty_print,
+            force_invalid_request,
+            sleep_time,
+            properties,
+            compression,
+            priority,
+        )
+        assembler = get_assembler(
+            options.as_dataframe, layout, value, dtype, max_memory, backend
+        )
 
-        for response in self._timed_fetch(
+        units = self._plan(
             NED_GRANULARITIES[granularity],
             start_date,
             end_date,
@@ -387,15 +1048,241 @@ class NedAPI:
             NED_CLASSIFICATIONS[classification],
             NED_ACTIVITIES[activity],
             NED_GRANULARITY_TIME_ZONES[granularitytimezone],
+        )
+        budget = FetchBudget(len(units), deadline, max_requests, on_progress, cancel)
+
+        for _, response in self._fetch_units(units, options, budget):
+            assembler.add(response)
+
+        if self._availability is not None:
+            self._availability.save()
+
+        if budget.reason is not None:
+            return mark_incomplete(
+                assembler.result(),
+                budget.reason,
+                options.as_dataframe or layout == "wide" or backend == "pandas",
+                backend,
+            )
+
+        return assembler.result()
+
+    def get_many(
+        self,
+        queries: List[dict],
+        pretty_print: Optional[bool] = None,
+        force_invalid_request: Optional[bool] = None,
+        sleep_time: Optional[float] = None,
+        properties: Optional[List[str]] = None,
+        compression: Optional[bool] = None,
+        deadline: Optional[Union[float, datetime]] = None,
+        max_requests: Optional[int] = None,
+        on_progress: Optional[Callable[[Progress], None]] = None,
+        cancel: Optional[threading.Event] = None,
+        priority: Optional[str] = None,
+    ) -> List[Union["pd.DataFrame", List[dict]]]:
+        """
+        Function that answers several queries with one deduplicated set of requests.
+
+        Every query is a dict with the keyword arguments of one of the get_* functions, named by
+        its "function" key (defaults to "get_request"). The periods of all queries are merged per
+        series (activity, classification, granularity, timezone, point and type), so overlapping
+        queries request their union once. The rows are routed back to every query whose days
+        they fall in, like the validfrom filter of the API.
+
+        Parameters:
+        queries (List[dict]): The queries, e.g. {"function": "get_forecast", "granularity": "Hour", "start_date": ...}.
+        The output arguments layout, value, dtype, as_dataframe, max_memory and backend can be given per query.
+        pretty_print (bool, optional): Overrides the pretty_print attribute for this call.
+        force_invalid_request (bool, optional): Overrides the force_invalid_request attribute for this call.
+        sleep_time (float, optional): Overrides the sleep_time attribute for this call.
+        properties (List[str], optional): Overrides the properties attribute for this call, an empty list requests
+        all properties.
+        compression (bool, optional): Overrides the compression attribute for this call.
+        deadline (Union[float, datetime], optional): Seconds from now, or the moment, after which no new requests are sent.
+        max_requests (int, optional): The maximum number of requests to send.
+        on_progress (Callable[[Progress], None], optional): Called after every unit with the progress, see get_request.
+        cancel (threading.Event, optional): Set the event from another thread to stop before the next request.
+        priority (str, optional): Overrides the priority attribute for this call.
+
+        Returns:
+        List[Union[pd.DataFrame, List[dict]]]: The result of every query, in the order of the queries.
+        All results are marked as incomplete when a budget stopped the requests.
+        """
+        options = self._options(
+            None,
+            pretty_print,
+            force_invalid_request,
+            sleep_time,
+            properties,
+            compression,
+            priority,
+        )
+        assemblers = []
+        outputs_dataframe = []
+        backends = []
+        periods: Dict[tuple, List[Tuple[datetime, datetime]]] = {}
+        routes: Dict[tuple, List[Tuple[int, str, str]]] = {}
+
+        for index, query in enumerate(self._resolve_query(query) for query in queries):
+            query_as_dataframe = (
+                options.as_dataframe
+                if query["as_dataframe"] is None
+                else query["as_dataframe"]
+            )
+            assemblers.append(
+                get_assembler(
+                    query_as_dataframe,
+                    query["layout"],
+                    query["value"],
+                    query["dtype"],
+                    query["max_memory"],
+                    query["backend"],
+                )
+            )
+            outputs_dataframe.append(
+                query_as_dataframe
+                or query["layout"] == "wide"
+                or query["backend"] == "pandas"
+            )
+            backends.append(query["backend"])
+
+            # The API filters on days, so the queries are merged and routed on days
+            start = datetime.combine(query["start_date"].date(), datetime.min.time())
+            end = datetime.combine(query["end_date"].date(), datetime.min.time())
+
+            for point in query["points"]:
+                for type in query["types"]:
+                    series = (
+                        query["activity"],
+                        query["classification"],
+                        query["granularity"],
+                        query["granularitytimezone"],
+                        point,
+                        type,
+                    )
+                    periods.setdefault(series, []).append((start, end))
+                    routes.setdefault(series, []).append(
+                        (index, f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}")
+                    )
+
+        units = []
+        for series, series_periods in periods.items():
+            activity, classification, granularity, granularitytimezone, point, type = series
+
+            for start, end in merge_periods(series_periods):
+                units += self._plan(
+                    granularity,
+                    start,
+                    end,
+                    [type],
+                    [point],
+                    classification,
+                    activity,
+                    granularitytimezone,
+                )
+
+        # Group the units by time window, so the sleep_time is kept per window
+        units.sort(key=lambda unit: (unit.start_date, unit.end_date))
+        self.logger.debug(f"Requesting {len(units)} units for {len(queries)} queries.")
+        budget = FetchBudget(len(units), deadline, max_requests, on_progress, cancel)
+
+        for unit, response in self._fetch_units(units, options, budget):
+            unit_start = f"{unit.start_date:%Y-%m-%d}"
+            unit_end = f"{unit.end_date:%Y-%m-%d}"
+
+            for index, start, end in routes[unit[:6]]:
+                if unit_end <= start or end <= unit_start:
+                    continue
+
+                if start <= unit_start and unit_end <= end:
+                    assemblers[index].add(response)
+                else:
+                    assemblers[index].add(
+                        [row for row in response if start <= row["validfrom"][:10] < end]
+                    )
+
+        if self._availability is not None:
+            self._availability.save()
+
+        if budget.reason is not None:
+            return [
+                mark_incomplete(assembler.result(), budget.reason, as_dataframe, backend)
+                for assembler, as_dataframe, backend in zip(
+                    assemblers, outputs_dataframe, backends
+                )
+            ]
+
+        return [assembler.result() for assembler in assemblers]
+
+    def _resolve_query(self, query: dict) -> dict:
+        """
+        Function that resolves a query of get_many to the arguments of get_request.
+
+        Parameters:
+        query (dict): The query.
+
+        Returns:
+        dict: The arguments of get_request, with codes for the granularity, classification, activity,
+        timezone, types and points, and the end_date filled in.
+        """
+        arguments = dict(query)
+        function = arguments.pop("function", "get_request")
+
+        if function not in QUERY_FUNCTIONS:
+            raise ValueError(
+                f"Function '{function}' not supported, use one of {list(QUERY_FUNCTIONS)}."
+            )
+
+        for option in (
+            "pretty_print",
+            "force_invalid_request",
+            "sleep_time",
+            "properties",
+            "compression",
+            "deadline",
+            "max_requests",
+            "on_progress",
+            "cancel",
+            "priority",
         ):
-            results = self._format_results(response)
+            if option in arguments:
+                raise ValueError(f"Option '{option}' must be passed to get_many.")
+
+        # Fill in the defaults of the function, then the defaults of get_request
+        bound = inspect.signature(getattr(self, function)).bind(**arguments)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.update(arguments.pop("kwargs", {}))
+
+        if QUERY_FUNCTIONS[function] is not None:
+            arguments["classification"], arguments["activity"] = QUERY_FUNCTIONS[
+                function
+            ]
+
+        bound = inspect.signature(self.get_request).bind(**arguments)
+        bound.apply_defaults()
+        arguments = bound.arguments
+
+        arguments["granularity"] = NED_GRANULARITIES[arguments["granularity"]]
+        arguments["classification"] = NED_CLASSIFICATIONS[arguments["classification"]]
+        arguments["activity"] = NED_ACTIVITIES[arguments["activity"]]
+        arguments["granularitytimezone"] = NED_GRANULARITY_TIME_ZONES[
+            arguments["granularitytimezone"]
+        ]
+        arguments["types"] = self._validate_values_and_get_codes(
+            arguments["types"], "NED_TYPES"
+        )
+        arguments["points"] = self._validate_values_and_get_codes(
+            arguments["points"], "NED_POINTS"
+        )
 
-            if isinstance(results, pd.DataFrame):
-                data = results.copy() if data is None else pd.concat([data, results])
-            elif isinstance(response, list):
-                data = results.copy() if data is None else data + results
+        if arguments["end_date"] is None:
+            arguments["end_date"] = arguments["start_date"] + timedelta(
+                days=TIMED_DAYS[arguments["granularity"]]
+            )
 
-        return data
+        return arguments
 
     def get_consumption(
         self,
@@ -410,7 +1297,8 @@ class NedAPI:
             "AllConsumingGas",
         ],
         points: Optional[List[str]] = ["Nederland"],
-    ) -> Union[pd.DataFrame, List[dict]]:
+        **kwargs,
+    ) -> Union["pd.DataFrame", List[dict]]:
 
         return self.get_request(
             granularity,
@@ -421,6 +1309,7 @@ class NedAPI:
             granularitytimezone,
             types,
             points,
+            **kwargs,
         )
 
     def get_forecast(
@@ -454,7 +1343,8 @@ class NedAPI:
             "Windpark Hollandse Kust Zuid",
             "Windpark Hollandse Kust Noord",
         ],
-    ) -> Union[pd.DataFrame, List[dict]]:
+        **kwargs,
+    ) -> Union["pd.DataFrame", List[dict]]:
 
         return self.get_request(
             granularity,
@@ -465,6 +1355,393 @@ class NedAPI:
             granularitytimezone,
             types,
             points,
+            **kwargs,
+        )
+
+    def snapshot_forecast(
+        self,
+        store: ForecastVintageStore,
+        granularity: str,
+        start_date: datetime,
+        end_date: Optional[datetime] = None,
+        **kwargs,
+    ) -> int:
+        """
+        Function that fetches the current forecast and records it as a vintage in the store.
+
+        Parameters:
+        store (ForecastVintageStore): The store to record the vintage in.
+        granularity (str): Granularity of the time, as a string.
+        start_date (datetime): The start date for the request.
+        end_date (datetime, optional): The end date for the request. If not provided, defaults to None.
+        **kwargs: Passed on to get_forecast, e.g. types and points.
+
+        Returns:
+        int: The id of the recorded vintage.
+        """
+        fetched_at = datetime.now(timezone.utc)
+        # The store needs the granularity columns, an empty list requests all properties
+        kwargs.update(as_dataframe=False, layout="long", properties=[])
+        forecast = self.get_forecast(granularity, start_date, end_date, **kwargs)
+
+        return store.record(forecast or [], fetched_at)
+
+    def publish_snapshot(self, directory: str, name: str, query: dict) -> dict:
+        """
+        Function that fetches a query and publishes the result as a memory-mappable Arrow snapshot.
+
+        Parameters:
+        directory (str): The snapshot directory.
+        name (str): The name of the snapshot, replaces the previous snapshot with this name.
+        query (dict): The query, like the queries of get_many, e.g. {"function": "get_production", ...}.
+
+        Returns:
+        dict: The manifest entry of the snapshot.
+        """
+        arguments = dict(query)
+        function = arguments.pop("function", "get_request")
+
+        if function not in QUERY_FUNCTIONS:
+            raise ValueError(
+                f"Function '{function}' not supported, use one of {list(QUERY_FUNCTIONS)}."
+            )
+
+        arguments.update(layout="long", backend="arrow")
+        result = getattr(self, function)(**arguments)
+
+        if not is_complete(result):
+            # A PartialList has the reason itself, an Arrow table in its metadata
+            reason = getattr(result, "reason", None) or result.schema.metadata[
+                b"reason"
+            ].decode()
+            raise ValueError(
+                f"Fetch for snapshot '{name}' stopped early ({reason}), not published."
+            )
+
+        return write_snapshot(directory, name, [] if result is None else result, query)
+
+    @staticmethod
+    def load_snapshot(
+        directory: str, name: str, backend: str = "arrow"
+    ) -> Union["pa.Table", "pd.DataFrame", "pl.DataFrame"]:
+        """
+        Function that opens a snapshot published with publish_snapshot, memory-mapped.
+
+        No request is sent, so it can be called on the class: `ned.NedAPI.load_snapshot(directory, name)`.
+
+        Parameters:
+        directory (str): The snapshot directory.
+        name (str): The name of the snapshot.
+        backend (str, optional): "arrow" for the memory-mapped pyarrow.Table, "polars" or "pandas" to convert it.
+        Defaults to "arrow".
+
+        Returns:
+        Union[pa.Table, pd.DataFrame, pl.DataFrame]: The snapshot.
+        """
+        return load_snapshot(directory, name, backend)
+
+    def sync(
+        self,
+        store: LocalStore,
+        queries: List[dict],
+        lookback: timedelta = timedelta(days=1),
+        **kwargs,
+    ) -> int:
+        """
+        Function that incrementally syncs the series of queries into a local store.
+
+        Every series (point and type of a query) is fetched from the day it was synced until,
+        minus the lookback for late and revised data, or from the start_date of the query if it
+        was never synced. Queries without end_date are synced up to and including today. The
+        series are marked as synced until today at most, so the days with data that may still
+        change are fetched again by the next sync.
+
+        Parameters:
+        store (LocalStore): The store to sync into.
+        queries (List[dict]): The queries, like the queries of get_many.
+        lookback (timedelta, optional): How far before the synced day to fetch again. Defaults to 1 day.
+        **kwargs: Passed on to get_many, e.g. sleep_time, deadline and max_requests.
+
+        Returns:
+        int: The number of rows stored.
+        """
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        series_queries = []
+
+        for query in queries:
+            query = dict(query)
+            if query.get("end_date") is None:
+                query["end_date"] = today + timedelta(days=1)
+            arguments = self._resolve_query(query)
+            # Compared with the naive days of the store
+            end_date = to_naive_utc(arguments["end_date"])
+
+            for series in self._series_of_query(arguments):
+                start_date = to_naive_utc(arguments["start_date"])
+                synced_until = store.synced_until(series)
+
+                if synced_until is not None:
+                    start_date = max(
+                        start_date,
+                        datetime.strptime(synced_until, "%Y-%m-%d") - lookback,
+                    )
+
+                if start_date < end_date:
+                    series_queries.append((series, start_date, end_date))
+
+        if not series_queries:
+            return 0
+
+        results = self._fetch_series(series_queries, **kwargs)
+
+        stored = 0
+        for (series, _, end_date), result in zip(series_queries, results):
+            stored += store.upsert(result or [])
+
+            # A stopped sync is continued from where the series was synced until before
+            if is_complete(result):
+                store.set_synced_until(series, min(end_date, today))
+
+        self.logger.debug(f"Synced {len(series_queries)} series, {stored} rows.")
+        return stored
+
+    def resync(
+        self,
+        store: LocalStore,
+        queries: List[dict],
+        probe_days: int = 31,
+        sleep_time: Optional[float] = None,
+        priority: Optional[str] = None,
+        **kwargs,
+    ) -> List[dict]:
+        """
+        Function that finds the windows of stored series that were revised, and replaces only those.
+
+        Every series (point and type of a query) is split in windows of probe_days. For every
+        window one row is requested, ordered by lastupdate, which returns the number of rows and
+        the latest lastupdate of the window as fingerprint. Only the windows whose fingerprint
+        differs from the fingerprint of the stored rows are fetched, and of those only the new,
+        changed and removed rows are written to the store.
+
+        Parameters:
+        store (LocalStore): The store to resync.
+        queries (List[dict]): The queries, like the queries of get_many, with the period to resync.
+        probe_days (int, optional): The number of days of a probed window, at least the window of a request. Defaults to 31.
+        sleep_time (float, optional): Overrides the sleep_time attribute for this call.
+        priority (str, optional): Overrides the priority attribute for this call.
+        **kwargs: Passed on to get_many for fetching the changed windows. The deadline, max_requests and cancel
+        also apply to the probes, and the refetch gets what is left of them.
+
+        Returns:
+        List[dict]: A revision per changed window, with the series, start_date, end_date, the stored and
+        fetched fingerprints (rows and lastupdate) and the number of added, removed and revised rows. A
+        PartialList if the budget ran out before all windows were probed and refetched.
+        """
+        options = self._options(sleep_time=sleep_time, priority=priority)
+        deadline = kwargs.pop("deadline", None)
+        max_requests = kwargs.pop("max_requests", None)
+        if deadline is not None and not isinstance(deadline, datetime):
+            # One moment for the probes and the refetch
+            deadline = datetime.now() + timedelta(seconds=deadline)
+
+        windows = []
+        for query in queries:
+            arguments = self._resolve_query(query)
+            days = max(probe_days, TIMED_DAYS[arguments["granularity"]])
+
+            for series in self._series_of_query(arguments):
+                for start_date, end_date in generate_loop(
+                    to_naive_utc(arguments["start_date"]),
+                    to_naive_utc(arguments["end_date"]),
+                    days,
+                ):
+                    unit = _Unit(
+                        arguments["activity"],
+                        arguments["classification"],
+                        arguments["granularity"],
+                        arguments["granularitytimezone"],
+                        NED_POINTS[series["point"]],
+                        NED_TYPES[series["type"]],
+                        start_date,
+                        end_date,
+                    )
+                    windows.append((series, unit))
+
+        budget = FetchBudget(
+            len(windows), deadline, max_requests, None, kwargs.get("cancel")
+        )
+        job = object()
+        changed = []
+        probed = 0
+
+        for series, unit in windows:
+            if budget.exhausted():
+                self.logger.warning(
+                    f"Stopped probing because of {budget.reason}, "
+                    f"probed {probed} of {len(windows)} windows."
+                )
+                break
+
+            waited = self._scheduler.acquire(
+                job,
+                options.priority,
+                True,
+                options.sleep_time,
+                budget.deadline,
+                budget.cancel,
+            )
+            if waited is None:
+                # The budget ran out while waiting, stops at the next check
+                continue
+
+            fetched = self._probe(unit, options, budget)
+            if fetched is None and budget.exhausted():
+                continue
+            budget.requested()
+            probed += 1
+
+            if fetched is None:
+                self.logger.warning(
+                    f"Could not probe {series['point']}/{series['type']} "
+                    f"from {unit.start_date:%Y-%m-%d}, skipped."
+                )
+                continue
+
+            stored = store.fingerprint(series, unit.start_date, unit.end_date)
+            if stored != fetched:
+                changed.append((series, unit.start_date, unit.end_date, stored, fetched))
+
+        self.logger.debug(f"Probed {probed} windows, {len(changed)} changed.")
+
+        if not changed:
+            return [] if budget.reason is None else PartialList([], budget.reason)
+
+        results = self._fetch_series(
+            [(series, start, end) for series, start, end, _, _ in changed],
+            sleep_time=sleep_time,
+            priority=priority,
+            deadline=deadline,
+            max_requests=None if max_requests is None else max(max_requests - probed, 0),
+            **kwargs,
+        )
+
+        reason = budget.reason
+        revisions = []
+        for (series, start_date, end_date, stored, fetched), result in zip(
+            changed, results
+        ):
+            # Replacing a window with a partial result would remove stored rows
+            if not is_complete(result):
+                reason = reason or result.reason
+                continue
+
+            revisions.append(
+                {
+                    **series,
+                    "start_date": f"{start_date:%Y-%m-%d}",
+                    "end_date": f"{end_date:%Y-%m-%d}",
+                    "stored_rows": stored[0],
+                    "stored_lastupdate": stored[1],
+                    "fetched_rows": fetched[0],
+                    "fetched_lastupdate": fetched[1],
+                    **store.replace(series, start_date, end_date, result or []),
+                }
+            )
+
+        self.logger.info(
+            f"Resynced {len(revisions)} of {probed} windows, "
+            f"{sum(revision['revised'] for revision in revisions)} rows revised."
+        )
+        return revisions if reason is None else PartialList(revisions, reason)
+
+    def _probe(
+        self,
+        unit: _Unit,
+        options: _CallOptions,
+        budget: Optional[FetchBudget] = None,
+    ) -> Optional[Tuple[int, Optional[str]]]:
+        """
+        Function that requests the fingerprint of a unit: the number of rows and the latest lastupdate.
+
+        Parameters:
+        unit (_Unit): The unit to probe.
+        options (_CallOptions): The options for the call.
+        budget (FetchBudget, optional): The budget of the probes, see _get. Defaults to None.
+
+        Returns:
+        Optional[Tuple[int, Optional[str]]]: The fingerprint, or None if the request failed.
+        """
+        params = unit.params(1)
+        params["order[lastupdate]"] = "desc"
+        response = self._get("utilizations", params, options, budget)
+
+        if not isinstance(response, dict) or "hydra:totalItems" not in response:
+            return None
+
+        members = response.get("hydra:member") or [{}]
+        return response["hydra:totalItems"], members[0].get("lastupdate")
+
+    def _series_of_query(self, arguments: dict) -> List[Dict[str, str]]:
+        """
+        Function that returns the series of a resolved query, with names as stored in a LocalStore.
+
+        Parameters:
+        arguments (dict): The query, resolved by _resolve_query.
+
+        Returns:
+        List[Dict[str, str]]: The activity, classification, granularity, granularitytimezone, point and type of
+        every series, for every point and then every type.
+        """
+        return [
+            {
+                "activity": NED_ACTIVITIES.inverse[arguments["activity"]],
+                "classification": NED_CLASSIFICATIONS.inverse[
+                    arguments["classification"]
+                ],
+                "granularity": NED_GRANULARITIES.inverse[arguments["granularity"]],
+                "granularitytimezone": NED_GRANULARITY_TIME_ZONES.inverse[
+                    arguments["granularitytimezone"]
+                ],
+                "point": NED_POINTS.inverse[point],
+                "type": NED_TYPES.inverse[type],
+            }
+            for point in arguments["points"]
+            for type in arguments["types"]
+        ]
+
+    def _fetch_series(
+        self, series_queries: List[Tuple[Dict[str, str], datetime, datetime]], **kwargs
+    ) -> List[List[dict]]:
+        """
+        Function that fetches periods of series with get_many, as lists of dicts.
+
+        All properties are requested, whatever the properties of the instance, because the store
+        keys the rows on the series columns and compares the lastupdate.
+
+        Parameters:
+        series_queries (List[Tuple[Dict[str, str], datetime, datetime]]): The series with the start and end date.
+        **kwargs: Passed on to get_many.
+
+        Returns:
+        List[List[dict]]: The rows of every period.
+        """
+        kwargs["properties"] = []
+        return self.get_many(
+            [
+                {
+                    "granularity": series["granularity"],
+                    "classification": series["classification"],
+                    "activity": series["activity"],
+                    "granularitytimezone": series["granularitytimezone"],
+                    "points": [series["point"]],
+                    "types": [series["type"]],
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "as_dataframe": False,
+                }
+                for series, start_date, end_date in series_queries
+            ],
+            **kwargs,
         )
 
     # Generic function to get the production of all types and points
@@ -476,7 +1753,8 @@ class NedAPI:
         granularitytimezone: str = "CET (Central European Time)",
         types: Optional[List[str]] = list(NED_TYPES.keys()),
         points: Optional[List[str]] = list(NED_POINTS.keys()),
-    ) -> Union[pd.DataFrame, List[dict]]:
+        **kwargs,
+    ) -> Union["pd.DataFrame", List[dict]]:
 
         return self.get_request(
             granularity,
@@ -487,6 +1765,7 @@ class NedAPI:
             granularitytimezone,
             types,
             points,
+            **kwargs,
         )
 
     def get_production_provinces(
@@ -497,7 +1776,8 @@ class NedAPI:
         granularitytimezone: str = "CET (Central European Time)",
         types: Optional[List[str]] = ["Wind", "Solar"],
         points: Optional[List[str]] = NED_POINTS_PROVINCES.keys(),  # All provinces
-    ) -> Union[pd.DataFrame, List[dict]]:
+        **kwargs,
+    ) -> Union["pd.DataFrame", List[dict]]:
 
         return self.get_request(
             granularity,
@@ -508,6 +1788,7 @@ class NedAPI:
             granularitytimezone,
             types,
             points,
+            **kwargs,
         )
 
     def get_production_offshore(
@@ -520,7 +1801,8 @@ class NedAPI:
         points: Optional[
             List[str]
         ] = NED_POINTS_OFFSHORE.keys(),  # All the offshore points
-    ) -> Union[pd.DataFrame, List[dict]]:
+        **kwargs,
+    ) -> Union["pd.DataFrame", List[dict]]:
 
         return self.get_request(
             granularity,
@@ -531,6 +1813,7 @@ class NedAPI:
             granularitytimezone,
             types,
             points,
+            **kwargs,
         )
 
     def get_production_netherlands(
@@ -541,7 +1824,8 @@ class NedAPI:
         granularitytimezone: str = "CET (Central European Time)",
         types: Optional[List[str]] = list(NED_TYPES.keys()),
         points: Optional[List[str]] = ["Nederland"],
-    ) -> Union[pd.DataFrame, List[dict]]:
+        **kwargs,
+    ) -> Union["pd.DataFrame", List[dict]]:
 
         return self.get_request(
             granularity,
@@ -552,4 +1836,5 @@ class NedAPI:
             granularitytimezone,
             types,
             points,
+            **kwargs,
         )
@@ -0,0 +1,199 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import threading
+import time
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from .scheduler import priority_code, stop_waiting, wait_timeout
+
+
+class NedPool:
+    """
+    Process-wide pool that NedAPI instances can register with to share one HTTP connection
+    pool and one rate budget.
+
+    Every request of a registered instance first acquires a slot from the pool. A slot is
+    only granted when both the global interval and the interval of the API key of the instance
+    have passed since the previous request. Instances waiting for a slot are served by the
+    priority of their request first and round-robin between equal priorities, so a busy instance
+    cannot starve the others, and an instance whose API key is still cooling down does not
+    block instances using another key.
+
+    Parameters:
+    global_interval (float, optional): Minimum seconds between two requests of all instances together. Defaults to 0.
+    key_interval (float, optional): Minimum seconds between two requests with the same API key. Defaults to 0.5.
+    key_intervals (Dict[str, float], optional): Per API key overrides of key_interval. Defaults to None.
+    max_connections (int, optional): Maximum number of connections kept open to the API. Defaults to 10.
+    """
+
+    _default: Optional["NedPool"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        global_interval: float = 0,
+        key_interval: float = 0.5,
+        key_intervals: Optional[Dict[str, float]] = None,
+        max_connections: int = 10,
+    ) -> None:
+        self._global_interval = global_interval
+        self._key_interval = key_interval
+        self._key_intervals = dict(key_intervals or {})
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._condition = threading.Condition()
+        self._clients = weakref.WeakSet()
+        self._global_next_slot = 0.0
+        self._key_next_slot: Dict[str, float] = {}
+        self._waiting: Dict[int, List[Tuple[int, object]]] = {}
+        self._rotation: Deque[int] = deque()
+        self._keys: Dict[int, str] = {}
+        self._granted = 0
+
+    @classmethod
+    def default(cls) -> "NedPool":
+        """
+        Function that returns the process-wide pool, creating it with the default budgets on first use.
+
+        Returns:
+        NedPool: The process-wide pool.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    @property
+    def granted(self) -> int:
+        return self._granted
+
+    @property
+    def waiting(self) -> int:
+        with self._condition:
+            return sum(len(tickets) for tickets in self._waiting.values())
+
+    def register(self, client) -> None:
+        """
+        Function that registers a NedAPI instance with the pool.
+
+        Parameters:
+        client (NedAPI): The instance to register.
+        """
+        with self._condition:
+            self._clients.add(client)
+
+    def set_key_interval(self, api_key: str, interval: float) -> None:
+        """
+        Function that sets the minimum interval between two requests with the given API key.
+
+        Parameters:
+        api_key (str): The API key.
+        interval (float): Minimum seconds between two requests with the API key.
+        """
+        with self._condition:
+            self._key_intervals[api_key] = interval
+            self._condition.notify_all()
+
+    def _next_slot(self, api_key: str) -> float:
+        return max(self._global_next_slot, self._key_next_slot.get(api_key, 0.0))
+
+    def _head(self, client_id: int) -> Tuple[int, object]:
+        # The first waiting request of the client with the highest priority
+        return min(self._waiting[client_id], key=lambda waiting: waiting[0])
+
+    def _next_client(self, now: float) -> Optional[int]:
+        # Of the clients whose key may send a request now, the first with the highest priority
+        ready = [
+            client_id
+            for client_id in self._rotation
+            if self._next_slot(self._keys[client_id]) <= now
+        ]
+        if not ready:
+            return None
+        return min(ready, key=lambda client_id: self._head(client_id)[0])
+
+    def acquire(
+        self,
+        client,
+        api_key: str,
+        priority: str = "normal",
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[float]:
+        """
+        Function that blocks until the client may send its next request.
+
+        Parameters:
+        client (NedAPI): The instance that wants to send a request.
+        api_key (str): The API key the request is sent with.
+        priority (str, optional): "interactive", "normal" or "background". Defaults to "normal".
+        deadline (float, optional): The time.monotonic() moment at which to stop waiting. Defaults to None.
+        cancel (threading.Event, optional): Stops waiting when set. Defaults to None.
+
+        Returns:
+        Optional[float]: The number of seconds waited, or None if the deadline passed or the cancel was set first.
+        """
+        client_id = id(client)
+        ticket = (priority_code(priority), object())
+        start = time.monotonic()
+
+        with self._condition:
+            if client_id not in self._waiting:
+                self._waiting[client_id] = []
+                self._rotation.append(client_id)
+            self._keys[client_id] = api_key
+            self._waiting[client_id].append(ticket)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if stop_waiting(now, deadline, cancel):
+                        return None
+
+                    chosen = self._next_client(now)
+
+                    if chosen == client_id and self._head(client_id) is ticket:
+                        break
+
+                    if chosen is None:
+                        timeout = (
+                            min(self._next_slot(self._keys[c]) for c in self._rotation)
+                            - now
+                        )
+                    else:
+                        # Another waiter may go now, wake it and wait until it has taken its slot
+                        self._condition.notify_all()
+                        timeout = None
+                    self._condition.wait(wait_timeout(timeout, now, deadline, cancel))
+            finally:
+                # Also when the wait stopped or raised, so the clients behind it are not blocked
+                self._waiting[client_id].remove(ticket)
+                self._rotation.remove(client_id)
+                if self._waiting[client_id]:
+                    # Go to the back of the rotation so other clients get their turn first
+                    self._rotation.append(client_id)
+                else:
+                    del self._waiting[client_id]
+                    del self._keys[client_id]
+                self._condition.notify_all()
+
+            self._global_next_slot = now + self._global_interval
+            self._key_next_slot[api_key] = now + self._key_intervals.get(
+                api_key, self._key_interval
+            )
+            self._granted += 1
+
+        return now - start
@@ -0,0 +1,191 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .metadata import (
+    NED_ACTIVITIES,
+    NED_CLASSIFICATIONS,
+    NED_GRANULARITIES,
+    NED_GRANULARITY_TIME_ZONES,
+    NED_POINTS,
+    NED_TYPES,
+)
+from .store import COLUMNS, VALUE_COLUMNS
+
+# Time buckets to group by, as the length of the validfrom prefix they keep
+TIME_BUCKETS: Dict[str, int] = {"year": 4, "month": 7, "day": 10, "hour": 13}
+
+GROUP_COLUMNS: List[str] = ["point", "type", "granularity", "granularitytimezone"]
+
+AGGREGATES: Dict[str, str] = {
+    "sum": "SUM",
+    "mean": "AVG",
+    "min": "MIN",
+    "max": "MAX",
+    "count": "COUNT",
+}
+
+OPERATORS: List[str] = ["=", "!=", "<", "<=", ">", ">=", "in"]
+
+
+def to_moment(moment: Union[datetime, str]) -> str:
+    return moment if isinstance(moment, str) else moment.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def validate(values: Sequence[str], constant, name: str) -> List[str]:
+    """
+    Function that validates names against a constant of the metadata.
+
+    Parameters:
+    values (Sequence[str]): The names.
+    constant (bidict): The constant, e.g. NED_POINTS.
+    name (str): The name of the constant, for the error.
+
+    Returns:
+    List[str]: The names.
+    """
+    values = [values] if isinstance(values, str) else list(values)
+    for value in values:
+        if value not in constant:
+            raise ValueError(f"'{value}' not found in the '{name}'.")
+    return values
+
+
+def build_query(
+    granularity: str,
+    points: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    start_date: Optional[Union[datetime, str]] = None,
+    end_date: Optional[Union[datetime, str]] = None,
+    classification: str = "Current",
+    activity: str = "Providing",
+    granularitytimezone: str = "CET (Central European Time)",
+    columns: Optional[List[str]] = None,
+    where: Optional[List[Tuple[str, str, object]]] = None,
+    group_by: Optional[List[str]] = None,
+    aggregate: Optional[Dict[str, Union[str, List[str]]]] = None,
+) -> Tuple[str, list, List[str]]:
+    """
+    Function that compiles a query of LocalStore.query to one SQL statement.
+
+    The series and the period become conditions on the primary key of the store, and the value
+    filters are added to the same WHERE clause, so SQLite only reads the rows of the requested
+    series and period. Only the requested columns are selected, and grouping and aggregating is
+    done by SQLite.
+
+    Parameters:
+    See LocalStore.query.
+
+    Returns:
+    Tuple[str, list, List[str]]: The SQL statement, its parameters and the names of the result columns.
+    """
+    validate(granularity, NED_GRANULARITIES, "NED_GRANULARITIES")
+    validate(classification, NED_CLASSIFICATIONS, "NED_CLASSIFICATIONS")
+    validate(activity, NED_ACTIVITIES, "NED_ACTIVITIES")
+    validate(
+        granularitytimezone, NED_GRANULARITY_TIME_ZONES, "NED_GRANULARITY_TIME_ZONES"
+    )
+
+    # In the order of the primary key, so the equalities and the period form one index range
+    conditions = [
+        "activity = ?",
+        "classification = ?",
+        "granularity = ?",
+        "granularitytimezone = ?",
+    ]
+    params: list = [activity, classification, granularity, granularitytimezone]
+
+    for column, values, constant, name in (
+        ("point", points, NED_POINTS, "NED_POINTS"),
+        ("type", types, NED_TYPES, "NED_TYPES"),
+    ):
+        # Without a filter all names of the metadata, so every series is one index range
+        values = list(constant) if values is None else validate(values, constant, name)
+        conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+
+    if start_date is not None:
+        conditions.append("validfrom >= ?")
+        params.append(to_moment(start_date))
+    if end_date is not None:
+        conditions.append("validfrom < ?")
+        params.append(to_moment(end_date))
+
+    for column, operator, value in where or []:
+        if column not in COLUMNS:
+            raise ValueError(f"Column '{column}' not found, use one of {COLUMNS}.")
+        if operator not in OPERATORS:
+            raise ValueError(
+                f"Operator '{operator}' not supported, use one of {OPERATORS}."
+            )
+
+        if operator == "in":
+            value = list(value)
+            conditions.append(f"{column} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        else:
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+
+    if group_by is None and aggregate is None:
+        columns = VALUE_COLUMNS if columns is None else columns
+        for column in columns:
+            if column not in VALUE_COLUMNS:
+                raise ValueError(
+                    f"Column '{column}' not found, use one of {VALUE_COLUMNS}."
+                )
+
+        names = ["point", "type", "validfrom"] + [
+            column for column in columns if column != "validfrom"
+        ]
+        return (
+            f"SELECT {', '.join(names)} FROM utilizations "
+            f"WHERE {' AND '.join(conditions)} ORDER BY point, type, validfrom",
+            params,
+            names,
+        )
+
+    if aggregate is None:
+        raise ValueError("Pass aggregate to group_by, e.g. {'volume': 'sum'}.")
+
+    names, selected = [], []
+    for group in group_by or []:
+        if group in TIME_BUCKETS:
+            selected.append(f"substr(validfrom, 1, {TIME_BUCKETS[group]})")
+        elif group in GROUP_COLUMNS:
+            selected.append(group)
+        else:
+            raise ValueError(
+                f"Cannot group by '{group}', "
+                f"use one of {GROUP_COLUMNS + list(TIME_BUCKETS)}."
+            )
+        names.append(group)
+
+    groups = len(selected)
+    for column, functions in aggregate.items():
+        if column not in VALUE_COLUMNS:
+            raise ValueError(
+                f"Column '{column}' not found, use one of {VALUE_COLUMNS}."
+            )
+
+        for function in [functions] if isinstance(functions, str) else functions:
+            if function not in AGGREGATES:
+                raise ValueError(
+                    f"Aggregate '{function}' not supported, "
+                    f"use one of {list(AGGREGATES)}."
+                )
+            selected.append(f"{AGGREGATES[function]}({column})")
+            names.append(
+                column if isinstance(functions, str) else f"{column}_{function}"
+            )
+
+    group_clause = ""
+    if groups:
+        positions = ", ".join(str(position + 1) for position in range(groups))
+        group_clause = f" GROUP BY {positions} ORDER BY {positions}"
+
+    return (
+        f"SELECT {', '.join(selected)} FROM utilizations "
+        f"WHERE {' AND '.join(conditions)}{group_clause}",
+        params,
+        names,
+    )
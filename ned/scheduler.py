@@ -0,0 +1,181 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import threading
+import time
+
+# Priority classes, a lower number is served first
+PRIORITIES: Dict[str, int] = {"interactive": 0, "normal": 1, "background": 2}
+
+# Seconds between two checks of the cancel event while waiting for a slot
+CANCEL_POLL = 0.05
+
+
+def priority_code(priority: str) -> int:
+    """
+    Function that validates a priority class and returns its rank.
+
+    Parameters:
+    priority (str): "interactive", "normal" or "background".
+
+    Returns:
+    int: The rank of the priority class, lower is served first.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(
+            f"Priority '{priority}' not supported, use one of {list(PRIORITIES)}."
+        )
+    return PRIORITIES[priority]
+
+
+def stop_waiting(
+    now: float, deadline: Optional[float], cancel: Optional[threading.Event]
+) -> bool:
+    return (cancel is not None and cancel.is_set()) or (
+        deadline is not None and now >= deadline
+    )
+
+
+def wait_timeout(
+    timeout: Optional[float],
+    now: float,
+    deadline: Optional[float],
+    cancel: Optional[threading.Event],
+) -> Optional[float]:
+    """
+    Function that shortens the timeout of a wait for a slot, so a deadline or cancel is noticed in time.
+
+    Parameters:
+    timeout (float, optional): The seconds until a slot may be free, None to wait for a notification.
+    now (float): The time.monotonic() moment.
+    deadline (float, optional): The time.monotonic() moment at which to stop waiting.
+    cancel (threading.Event, optional): Stops waiting when set.
+
+    Returns:
+    Optional[float]: The timeout to wait with.
+    """
+    timeouts = [
+        timeout,
+        None if deadline is None else deadline - now,
+        None if cancel is None else CANCEL_POLL,
+    ]
+    timeouts = [timeout for timeout in timeouts if timeout is not None]
+    return min(timeouts) if timeouts else None
+
+
+class Scheduler:
+    """
+    Thread-safe scheduler that grants the requests of concurrent jobs one at a time.
+
+    Waiting requests are served by priority class first, so an interactive request goes before
+    all queued normal and background requests, and round-robin between the jobs of the same
+    class, so a long job cannot starve the others. A request that starts a new time window
+    only gets a slot once the interval since the previous window has passed, the other
+    requests of a window are granted as soon as it is their turn.
+
+    Parameters:
+    interval (float, optional): The default minimum number of seconds between two windows. Defaults to 0.
+    """
+
+    def __init__(self, interval: float = 0) -> None:
+        self._interval = interval
+        self._next_slot = 0.0
+        self._condition = threading.Condition()
+        self._waiting: Dict[Tuple[int, int], Deque[Tuple[object, bool]]] = {}
+        self._rotations: List[Deque[Tuple[int, int]]] = [
+            deque() for _ in PRIORITIES
+        ]
+        self._granted = [0] * len(PRIORITIES)
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def granted(self) -> Dict[str, int]:
+        return {name: self._granted[rank] for name, rank in PRIORITIES.items()}
+
+    @property
+    def waiting(self) -> int:
+        with self._condition:
+            return sum(len(tickets) for tickets in self._waiting.values())
+
+    def _next_ticket(self, now: float) -> Optional[object]:
+        # The first ready request in the rotation of the highest priority class
+        for rotation in self._rotations:
+            for job_id in rotation:
+                ticket, new_window = self._waiting[job_id][0]
+                if not new_window or self._next_slot <= now:
+                    return ticket
+        return None
+
+    def acquire(
+        self,
+        job: object,
+        priority: str = "normal",
+        new_window: bool = True,
+        interval: Optional[float] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[float]:
+        """
+        Function that blocks until the job may send its next request.
+
+        Parameters:
+        job (object): The job the request belongs to, e.g. the fetch of one call.
+        priority (str, optional): "interactive", "normal" or "background". Defaults to "normal".
+        new_window (bool, optional): Whether the request starts a new time window and must wait for the interval.
+        Defaults to True.
+        interval (float, optional): The interval to keep free after a new window. Defaults to the scheduler interval.
+        deadline (float, optional): The time.monotonic() moment at which to stop waiting. Defaults to None.
+        cancel (threading.Event, optional): Stops waiting when set. Defaults to None.
+
+        Returns:
+        Optional[float]: The number of seconds waited, or None if the deadline passed or the cancel was set first.
+        """
+        rank = priority_code(priority)
+        if interval is None:
+            interval = self._interval
+
+        job_id = (rank, id(job))
+        ticket = object()
+        start = time.monotonic()
+
+        with self._condition:
+            if job_id not in self._waiting:
+                self._waiting[job_id] = deque()
+                self._rotations[rank].append(job_id)
+            self._waiting[job_id].append((ticket, new_window))
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if stop_waiting(now, deadline, cancel):
+                        return None
+
+                    chosen = self._next_ticket(now)
+                    if chosen is ticket:
+                        break
+
+                    if chosen is None:
+                        timeout = self._next_slot - now
+                    else:
+                        # Another request may go now, wake it and wait until it has taken its turn
+                        self._condition.notify_all()
+                        timeout = None
+                    self._condition.wait(wait_timeout(timeout, now, deadline, cancel))
+            finally:
+                # Also when the wait stopped or raised, so the requests behind it are not blocked
+                self._waiting[job_id].remove((ticket, new_window))
+                self._rotations[rank].remove(job_id)
+                if self._waiting[job_id]:
+                    # Go to the back of the rotation so the other jobs of the class get their turn first
+                    self._rotations[rank].append(job_id)
+                else:
+                    del self._waiting[job_id]
+                self._condition.notify_all()
+
+            if new_window:
+                self._next_slot = now + interval
+            self._granted[rank] += 1
+
+        return now - start
@@ -0,0 +1,303 @@
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, TYPE_CHECKING
+from urllib.parse import parse_qs, urlparse
+import json
+import logging
+import threading
+
+from .metadata import NED_GRANULARITIES
+from .store import LocalStore
+
+if TYPE_CHECKING:
+    from .ned import NedAPI
+
+logger = logging.getLogger(__name__)
+
+# The parameters of get_request that are read from the store, other parameters are rejected
+READ_PARAMETERS: List[str] = [
+    "function",
+    "granularity",
+    "classification",
+    "activity",
+    "start_date",
+    "end_date",
+    "granularitytimezone",
+    "types",
+    "points",
+]
+
+LIST_PARAMETERS: List[str] = ["types", "points"]
+
+
+def parse_date(value: str) -> datetime:
+    """
+    Function that parses a date of the configuration or of a read request.
+
+    Parameters:
+    value (str): The date as "YYYY-MM-DD", or a moment in ISO format.
+
+    Returns:
+    datetime: The parsed date.
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{value}' is not a date in ISO format (YYYY-MM-DD).")
+
+
+class SyncDaemon:
+    """
+    Runs the syncs of a configuration into a local store, every `interval` seconds.
+
+    Every sync is a query like the queries of NedAPI.get_many, with the start_date as ISO
+    string. Instead of an end_date, a sync can have "days_ahead", to sync forecasts up to that
+    number of days after today.
+
+    Parameters:
+    nedapi (NedAPI): The client to fetch with.
+    store (LocalStore): The store to sync into.
+    syncs (List[dict]): The queries to sync.
+    interval (float, optional): Seconds between the start of two syncs. Defaults to 900.
+    lookback (timedelta, optional): How far before the synced day to fetch again. Defaults to 1 day.
+    """
+
+    def __init__(
+        self,
+        nedapi: "NedAPI",
+        store: LocalStore,
+        syncs: List[dict],
+        interval: float = 900,
+        lookback: timedelta = timedelta(days=1),
+    ) -> None:
+        self._nedapi = nedapi
+        self._store = store
+        self._syncs = syncs
+        self._interval = interval
+        self._lookback = lookback
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_sync: Optional[dict] = None
+
+    def queries(self) -> List[dict]:
+        """
+        Function that converts the syncs of the configuration to queries of get_many.
+
+        Returns:
+        List[dict]: The queries, with the dates parsed and days_ahead converted to an end_date.
+        """
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        queries = []
+
+        for sync in self._syncs:
+            query = dict(sync)
+            query["start_date"] = parse_date(query["start_date"])
+
+            days_ahead = query.pop("days_ahead", None)
+            if days_ahead is not None:
+                query["end_date"] = today + timedelta(days=days_ahead + 1)
+            elif query.get("end_date") is not None:
+                query["end_date"] = parse_date(query["end_date"])
+
+            queries.append(query)
+
+        return queries
+
+    def run_once(self) -> int:
+        """
+        Function that runs all syncs once, with the deadline of one interval.
+
+        Returns:
+        int: The number of rows stored.
+        """
+        started_at = datetime.now()
+        stored = self._nedapi.sync(
+            self._store,
+            self.queries(),
+            self._lookback,
+            deadline=self._interval,
+            cancel=self._stop,
+        )
+        self.last_sync = {
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": stored,
+        }
+        logger.info(f"Synced {stored} rows.")
+        return stored
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                # Keep serving and retry at the next interval
+                logger.exception("Sync failed.")
+
+            self._stop.wait(self._interval)
+
+    def start(self) -> None:
+        """
+        Function that starts syncing in a background thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="ned-sync", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Function that stops syncing, a running sync stops before its next request.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def read_arguments(query: str) -> dict:
+    """
+    Function that converts the query string of a read request to the arguments of LocalStore.get_request.
+
+    The parameters are named like the parameters of NedAPI.get_request. types and points can be
+    repeated or comma-separated, a "function" of get_many fills in the classification and activity.
+
+    Parameters:
+    query (str): The query string.
+
+    Returns:
+    dict: The arguments, without end_date the period of get_request is used.
+    """
+    from .ned import QUERY_FUNCTIONS, TIMED_DAYS
+
+    parameters = parse_qs(query, keep_blank_values=True)
+    unknown = set(parameters) - set(READ_PARAMETERS)
+    if unknown:
+        raise ValueError(
+            f"Unknown parameters {sorted(unknown)}, use {READ_PARAMETERS}."
+        )
+
+    arguments = {}
+    for name, values in parameters.items():
+        if name in LIST_PARAMETERS:
+            arguments[name] = [
+                item for value in values for item in value.split(",") if item
+            ]
+        else:
+            arguments[name] = values[-1]
+
+    function = arguments.pop("function", "get_request")
+    if function not in QUERY_FUNCTIONS:
+        raise ValueError(
+            f"Function '{function}' not supported, use one of {list(QUERY_FUNCTIONS)}."
+        )
+    if QUERY_FUNCTIONS[function] is not None:
+        arguments["classification"], arguments["activity"] = QUERY_FUNCTIONS[function]
+
+    for name in ("granularity", "classification", "activity", "start_date"):
+        if name not in arguments:
+            raise ValueError(f"Parameter '{name}' is required.")
+
+    arguments["start_date"] = parse_date(arguments["start_date"])
+    if "end_date" in arguments:
+        arguments["end_date"] = parse_date(arguments["end_date"])
+    else:
+        arguments["end_date"] = arguments["start_date"] + timedelta(
+            days=TIMED_DAYS[NED_GRANULARITIES[arguments["granularity"]]]
+        )
+
+    return arguments
+
+
+def make_server(
+    store: LocalStore,
+    host: str = "127.0.0.1",
+    port: int = 8710,
+    daemon: Optional[SyncDaemon] = None,
+) -> ThreadingHTTPServer:
+    """
+    Function that creates the HTTP server for reading a local store.
+
+    GET /v1/utilizations returns the stored rows as JSON list, for the parameters of get_request,
+    e.g. `?granularity=Hour&classification=Current&activity=Providing&start_date=2024-01-01&types=Wind`.
+    GET /v1/status returns until when every series has been synced and the last sync of the daemon.
+
+    Parameters:
+    store (LocalStore): The store to read.
+    host (str, optional): The host to listen on. Defaults to "127.0.0.1".
+    port (int, optional): The port to listen on, 0 for any free port. Defaults to 8710.
+    daemon (SyncDaemon, optional): The daemon to report the last sync of. Defaults to None.
+
+    Returns:
+    ThreadingHTTPServer: The server, call `serve_forever()` to serve.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+
+            if url.path == "/v1/utilizations":
+                try:
+                    body = store.get_request(**read_arguments(url.query))
+                except (KeyError, ValueError) as error:
+                    self._send(400, {"error": str(error)})
+                    return
+            elif url.path == "/v1/status":
+                body = {
+                    "series": store.sync_status(),
+                    "last_sync": None if daemon is None else daemon.last_sync,
+                }
+            else:
+                self._send(404, {"error": f"Unknown path '{url.path}'."})
+                return
+
+            self._send(200, body)
+
+        def _send(self, status: int, body) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug(format % args)
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(config: dict) -> None:
+    """
+    Function that syncs the configured queries in the background and serves the store until interrupted.
+
+    Parameters:
+    config (dict): The configuration, with "api_key", "store" (path of the SQLite file), "syncs" (the
+    queries to sync) and optionally "host", "port", "interval", "lookback_days" and "sleep_time".
+    """
+    from .ned import NedAPI
+
+    nedapi = NedAPI(config["api_key"], sleep_time=config.get("sleep_time", 0.5))
+    store = LocalStore(config["store"])
+    daemon = SyncDaemon(
+        nedapi,
+        store,
+        config["syncs"],
+        config.get("interval", 900),
+        timedelta(days=config.get("lookback_days", 1)),
+    )
+    server = make_server(
+        store, config.get("host", "127.0.0.1"), config.get("port", 8710), daemon
+    )
+
+    daemon.start()
+    host, port = server.server_address[:2]
+    logger.info(f"Serving {config['store']} on http://{host}:{port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        store.close()
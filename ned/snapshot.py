@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Union, TYPE_CHECKING
+import json
+import os
+import uuid
+
+from .backends import batch_to_arrow, import_pyarrow
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import polars as pl
+    import pyarrow as pa
+
+    from .assembly import ChunkedResult
+
+MANIFEST = "manifest.json"
+
+
+def read_manifest(directory: str) -> Dict[str, dict]:
+    """
+    Function that returns the snapshots published in a directory.
+
+    Parameters:
+    directory (str): The snapshot directory.
+
+    Returns:
+    Dict[str, dict]: Per snapshot name the file, number of rows, columns, publish moment and query.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as file:
+        return json.load(file)["snapshots"]
+
+
+@contextmanager
+def manifest_lock(directory: str) -> Iterator[None]:
+    """
+    Function that holds an exclusive lock on the manifest of a directory, also between processes.
+
+    Parameters:
+    directory (str): The snapshot directory.
+    """
+    with open(os.path.join(directory, f"{MANIFEST}.lock"), "a") as file:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows, where a byte of the lock file is locked instead
+            import msvcrt
+
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def to_arrow(
+    data: Union["pa.Table", "pd.DataFrame", "pl.DataFrame", "ChunkedResult", List[dict]],
+) -> "pa.Table":
+    """
+    Function that converts a result of NedAPI to an Arrow table.
+
+    Parameters:
+    data (Union[pa.Table, pd.DataFrame, pl.DataFrame, ChunkedResult, List[dict]]): The result.
+
+    Returns:
+    pa.Table: The result as Arrow table.
+    """
+    pa = import_pyarrow()
+
+    if isinstance(data, pa.Table):
+        return data
+    if isinstance(data, list):
+        if not data:
+            return pa.table({})
+        return pa.Table.from_batches([batch_to_arrow(data)])
+    if hasattr(data, "iter_tables"):
+        tables = list(data.iter_tables())
+        if not tables:
+            return pa.table({})
+        return pa.concat_tables(tables, promote_options="permissive")
+    if hasattr(data, "to_arrow"):
+        return data.to_arrow()
+
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def write_snapshot(
+    directory: str,
+    name: str,
+    data: Union["pa.Table", "pd.DataFrame", "pl.DataFrame", "ChunkedResult", List[dict]],
+    query: Optional[dict] = None,
+) -> dict:
+    """
+    Function that publishes a dataset as an uncompressed Arrow IPC (Feather v2) file and registers it in the manifest.
+
+    Every publish writes a new file and then replaces the manifest atomically under a lock, so
+    readers always see a complete snapshot and concurrent publishers keep each other's entries.
+    Readers that still map the previous file keep their copy, the previous file of the snapshot
+    is removed where the platform allows it.
+
+    Parameters:
+    directory (str): The snapshot directory, created if it does not exist.
+    name (str): The name of the snapshot.
+    data (Union[pa.Table, pd.DataFrame, pl.DataFrame, ChunkedResult, List[dict]]): The dataset.
+    query (dict, optional): The query the dataset was fetched with, stored in the manifest. Defaults to None.
+
+    Returns:
+    dict: The manifest entry of the snapshot.
+    """
+    pa = import_pyarrow()
+    table = to_arrow(data)
+
+    os.makedirs(directory, exist_ok=True)
+    file_name = f"{name}-{uuid.uuid4().hex[:12]}.arrow"
+    path = os.path.join(directory, file_name)
+
+    # Written without compression, so readers can use the mapped buffers without decoding
+    with pa.OSFile(f"{path}.tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(f"{path}.tmp", path)
+
+    entry = {
+        "file": file_name,
+        "rows": table.num_rows,
+        "columns": table.column_names,
+        "published_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "query": query,
+    }
+
+    # Locked, so concurrent publishes of other snapshots do not drop each other's entries
+    with manifest_lock(directory):
+        snapshots = read_manifest(directory)
+        previous = snapshots.get(name)
+        snapshots[name] = entry
+
+        manifest = os.path.join(directory, MANIFEST)
+        with open(f"{manifest}.tmp", "w") as file:
+            json.dump(
+                {"version": 1, "snapshots": snapshots}, file, indent=4, default=str
+            )
+        os.replace(f"{manifest}.tmp", manifest)
+
+    if previous is not None:
+        try:
+            # Processes that mapped the file keep reading it until they unmap it
+            os.remove(os.path.join(directory, previous["file"]))
+        except OSError:
+            pass
+
+    return entry
+
+
+def load_snapshot(
+    directory: str, name: str, backend: str = "arrow"
+) -> Union["pa.Table", "pd.DataFrame", "pl.DataFrame"]:
+    """
+    Function that opens a published snapshot memory-mapped.
+
+    The Arrow table references the pages of the file directly, so loading is near instant and
+    all processes that open the snapshot share one copy in the page cache.
+
+    Parameters:
+    directory (str): The snapshot directory.
+    name (str): The name of the snapshot.
+    backend (str, optional): "arrow" for the memory-mapped pyarrow.Table, "polars" or "pandas" to convert it.
+    Defaults to "arrow".
+
+    Returns:
+    Union[pa.Table, pd.DataFrame, pl.DataFrame]: The snapshot.
+    """
+    pa = import_pyarrow()
+
+    for attempt in range(2):
+        snapshots = read_manifest(directory)
+        if name not in snapshots:
+            raise ValueError(
+                f"Snapshot '{name}' not found in '{directory}', use one of {list(snapshots)}."
+            )
+
+        try:
+            source = pa.memory_map(os.path.join(directory, snapshots[name]["file"]))
+            break
+        except FileNotFoundError:
+            # The snapshot was published again after the manifest was read
+            if attempt == 1:
+                raise
+
+    table = pa.ipc.open_file(source).read_all()
+
+    if backend == "arrow":
+        return table
+    if backend == "polars":
+        import polars as pl
+
+        return pl.from_arrow(table)
+    if backend == "pandas":
+        return table.to_pandas()
+
+    raise ValueError(
+        f"Backend '{backend}' not supported, use 'arrow', 'polars' or 'pandas'."
+    )
@@ -0,0 +1,417 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+import sqlite3
+import threading
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SERIES_COLUMNS: List[str] = [
+    "activity",
+    "classification",
+    "granularity",
+    "granularitytimezone",
+    "point",
+    "type",
+]
+
+KEY_COLUMNS: List[str] = SERIES_COLUMNS + ["validfrom"]
+
+VALUE_COLUMNS: List[str] = [
+    "validto",
+    "capacity",
+    "volume",
+    "percentage",
+    "emission",
+    "emissionfactor",
+    "lastupdate",
+]
+
+# The columns compared to decide whether a row was revised, a row that is published again with
+# the same values only gets a new lastupdate
+COMPARED_COLUMNS: List[str] = [
+    column for column in VALUE_COLUMNS if column != "lastupdate"
+]
+
+COLUMNS: List[str] = KEY_COLUMNS + VALUE_COLUMNS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS utilizations (
+    {", ".join(f"{column} TEXT NOT NULL" for column in KEY_COLUMNS)},
+    {", ".join(VALUE_COLUMNS)},
+    PRIMARY KEY ({", ".join(KEY_COLUMNS)})
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS synced (
+    {", ".join(f"{column} TEXT NOT NULL" for column in SERIES_COLUMNS)},
+    synced_until TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY ({", ".join(SERIES_COLUMNS)})
+) WITHOUT ROWID;
+"""
+
+
+def to_day(moment: Union[datetime, str]) -> str:
+    return moment if isinstance(moment, str) else moment.strftime("%Y-%m-%d")
+
+
+class LocalStore:
+    """
+    SQLite store of utilizations as returned by NedAPI, one row per series and validfrom.
+
+    The rows are stored with the human-readable names of NedAPI, keyed on activity,
+    classification, granularity, timezone, point, type and validfrom, so storing a row again
+    replaces it. The store also keeps until when every series has been synced.
+
+    Parameters:
+    path (str, optional): The SQLite database file. Defaults to ":memory:".
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # Let readers in other processes read while a sync writes
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM utilizations"
+            ).fetchone()[0]
+
+    def upsert(self, rows: Union[List[dict], "pd.DataFrame"]) -> int:
+        """
+        Function that stores rows, replacing stored rows with the same series and validfrom.
+
+        Parameters:
+        rows (Union[List[dict], pd.DataFrame]): The rows as returned by NedAPI.get_request.
+
+        Returns:
+        int: The number of rows stored.
+        """
+        if not isinstance(rows, list):
+            rows = rows.to_dict("records")
+
+        with self._lock, self._connection:
+            return self._connection.executemany(
+                f"INSERT OR REPLACE INTO utilizations ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                (
+                    tuple(str(row[column]) for column in KEY_COLUMNS)
+                    + tuple(row.get(column) for column in VALUE_COLUMNS)
+                    for row in rows
+                ),
+            ).rowcount
+
+    def synced_until(self, series: Dict[str, str]) -> Optional[str]:
+        """
+        Function that returns until which day a series has been synced.
+
+        Parameters:
+        series (Dict[str, str]): The activity, classification, granularity, granularitytimezone, point and type.
+
+        Returns:
+        Optional[str]: The (exclusive) day as "YYYY-MM-DD", or None if the series has never been synced.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT synced_until FROM synced WHERE "
+                f"{' AND '.join(f'{column} = ?' for column in SERIES_COLUMNS)}",
+                [series[column] for column in SERIES_COLUMNS],
+            ).fetchone()
+
+        return None if row is None else row[0]
+
+    def set_synced_until(
+        self, series: Dict[str, str], synced_until: Union[datetime, str]
+    ) -> None:
+        """
+        Function that records until which day a series has been synced.
+
+        Parameters:
+        series (Dict[str, str]): The activity, classification, granularity, granularitytimezone, point and type.
+        synced_until (Union[datetime, str]): The (exclusive) day.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO synced ({', '.join(SERIES_COLUMNS)}, synced_until, synced_at) "
+                f"VALUES ({', '.join('?' * (len(SERIES_COLUMNS) + 2))})",
+                [series[column] for column in SERIES_COLUMNS]
+                + [to_day(synced_until), datetime.now().isoformat(timespec="seconds")],
+            )
+
+    def sync_status(self) -> List[dict]:
+        """
+        Function that returns until when every synced series has been synced.
+
+        Returns:
+        List[dict]: The series with their synced_until day and the moment of the last sync.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                f"SELECT {', '.join(SERIES_COLUMNS)}, synced_until, synced_at FROM synced"
+            )
+            names = [description[0] for description in cursor.description]
+            return [dict(zip(names, row)) for row in cursor]
+
+    def _series_conditions(
+        self,
+        series: Dict[str, str],
+        start_date: Union[datetime, str],
+        end_date: Union[datetime, str],
+    ) -> Tuple[str, list]:
+        return (
+            " AND ".join(f"{column} = ?" for column in SERIES_COLUMNS)
+            + " AND validfrom >= ? AND validfrom < ?",
+            [series[column] for column in SERIES_COLUMNS]
+            + [to_day(start_date), to_day(end_date)],
+        )
+
+    def fingerprint(
+        self,
+        series: Dict[str, str],
+        start_date: Union[datetime, str],
+        end_date: Union[datetime, str],
+    ) -> Tuple[int, Optional[str]]:
+        """
+        Function that returns the fingerprint of the stored rows of a series in a window of days.
+
+        Parameters:
+        series (Dict[str, str]): The activity, classification, granularity, granularitytimezone, point and type.
+        start_date (Union[datetime, str]): The first day of the window.
+        end_date (Union[datetime, str]): The (exclusive) last day of the window.
+
+        Returns:
+        Tuple[int, Optional[str]]: The number of rows and the latest lastupdate of the rows.
+        """
+        conditions, params = self._series_conditions(series, start_date, end_date)
+
+        with self._lock:
+            rows, lastupdate = self._connection.execute(
+                f"SELECT COUNT(*), MAX(lastupdate) FROM utilizations WHERE {conditions}",
+                params,
+            ).fetchone()
+
+        return rows, lastupdate
+
+    def replace(
+        self,
+        series: Dict[str, str],
+        start_date: Union[datetime, str],
+        end_date: Union[datetime, str],
+        rows: List[dict],
+    ) -> Dict[str, int]:
+        """
+        Function that brings the stored rows of a series in a window of days in line with the given rows.
+
+        Only the rows that are new or differ from the stored row are written, and the stored rows
+        that are no longer returned are removed. A row only counts as revised when one of its
+        values changed, not when only its lastupdate did.
+
+        Parameters:
+        series (Dict[str, str]): The activity, classification, granularity, granularitytimezone, point and type.
+        start_date (Union[datetime, str]): The first day of the window.
+        end_date (Union[datetime, str]): The (exclusive) last day of the window.
+        rows (List[dict]): All rows of the series in the window, as returned by NedAPI.get_request.
+
+        Returns:
+        Dict[str, int]: The number of "added", "removed" and "revised" rows.
+        """
+        conditions, params = self._series_conditions(series, start_date, end_date)
+        incoming = {
+            str(row["validfrom"]): tuple(row.get(column) for column in VALUE_COLUMNS)
+            for row in rows
+        }
+        compared = [VALUE_COLUMNS.index(column) for column in COMPARED_COLUMNS]
+
+        with self._lock, self._connection:
+            stored = {
+                validfrom: tuple(values)
+                for validfrom, *values in self._connection.execute(
+                    f"SELECT validfrom, {', '.join(VALUE_COLUMNS)} FROM utilizations "
+                    f"WHERE {conditions}",
+                    params,
+                )
+            }
+            removed = stored.keys() - incoming.keys()
+            changed = {
+                validfrom: values
+                for validfrom, values in incoming.items()
+                if stored.get(validfrom) != values
+            }
+
+            self._connection.executemany(
+                f"DELETE FROM utilizations WHERE {conditions} AND validfrom = ?",
+                (params + [validfrom] for validfrom in removed),
+            )
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO utilizations ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                (
+                    tuple(series[column] for column in SERIES_COLUMNS)
+                    + (validfrom,)
+                    + values
+                    for validfrom, values in changed.items()
+                ),
+            )
+
+        return {
+            "added": len(changed.keys() - stored.keys()),
+            "removed": len(removed),
+            "revised": sum(
+                any(stored[validfrom][index] != values[index] for index in compared)
+                for validfrom, values in changed.items()
+                if validfrom in stored
+            ),
+        }
+
+    def get_request(
+        self,
+        granularity: str,
+        classification: str,
+        activity: str,
+        start_date: Union[datetime, str],
+        end_date: Union[datetime, str],
+        granularitytimezone: str = "CET (Central European Time)",
+        types: Optional[List[str]] = None,
+        points: Optional[List[str]] = None,
+        as_dataframe: bool = False,
+    ) -> Union["pd.DataFrame", List[dict]]:
+        """
+        Function that reads stored rows, with the parameters of NedAPI.get_request.
+
+        Like the API, the validfrom of the rows is compared on days.
+
+        Parameters:
+        granularity (str): Granularity of the time, as a string.
+        classification (str): The classification of the data, as a string.
+        activity (str): The activity type of the data, as a string.
+        start_date (Union[datetime, str]): The first day to return.
+        end_date (Union[datetime, str]): The (exclusive) last day to return.
+        granularitytimezone (str, optional): The timezone for the granularity. Defaults to "CET (Central European Time)".
+        types (List[str], optional): Types to return. Defaults to all types.
+        points (List[str], optional): Points to return. Defaults to all points.
+        as_dataframe (bool, optional): Whether to return a DataFrame instead of a list of dicts. Defaults to False.
+
+        Returns:
+        Union[pd.DataFrame, List[dict]]: The stored rows, ordered by point, type and validfrom.
+        """
+        conditions = [
+            "activity = ?",
+            "classification = ?",
+            "granularity = ?",
+            "granularitytimezone = ?",
+            "validfrom >= ?",
+            "validfrom < ?",
+        ]
+        params = [
+            activity,
+            classification,
+            granularity,
+            granularitytimezone,
+            to_day(start_date),
+            to_day(end_date),
+        ]
+
+        for column, values in (("point", points), ("type", types)):
+            if values is not None:
+                values = list(values)
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+
+        with self._lock:
+            cursor = self._connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM utilizations "
+                f"WHERE {' AND '.join(conditions)} ORDER BY point, type, validfrom",
+                params,
+            )
+            rows = [dict(zip(COLUMNS, row)) for row in cursor]
+
+        if as_dataframe:
+            import pandas as pd
+
+            return pd.DataFrame(rows, columns=COLUMNS)
+
+        return rows
+
+    def query(
+        self,
+        granularity: str,
+        points: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        start_date: Optional[Union[datetime, str]] = None,
+        end_date: Optional[Union[datetime, str]] = None,
+        classification: str = "Current",
+        activity: str = "Providing",
+        granularitytimezone: str = "CET (Central European Time)",
+        columns: Optional[List[str]] = None,
+        where: Optional[List[Tuple[str, str, object]]] = None,
+        group_by: Optional[List[str]] = None,
+        aggregate: Optional[Dict[str, Union[str, List[str]]]] = None,
+        as_dataframe: bool = False,
+    ) -> Union["pd.DataFrame", List[dict]]:
+        """
+        Function that filters and aggregates the stored rows in SQLite, without loading the series.
+
+        The points, types, granularity, classification, activity and timezone are names of the
+        metadata, e.g. `store.query("Hour", points=["Zeeland"], types=["Solar"], start_date="2023-04-01",
+        end_date="2023-07-01", group_by=["month"], aggregate={"volume": "sum"})`. The filters are
+        pushed down to the primary key of the store and only the requested columns are read.
+
+        Parameters:
+        granularity (str): Granularity of the time, as a string.
+        points (List[str], optional): Points to return. Defaults to all points.
+        types (List[str], optional): Types to return. Defaults to all types.
+        start_date (Union[datetime, str], optional): Only rows valid from this moment onwards, in the timezone of the data.
+        end_date (Union[datetime, str], optional): Only rows valid from before this moment, in the timezone of the data.
+        classification (str, optional): The classification of the data. Defaults to "Current".
+        activity (str, optional): The activity of the data. Defaults to "Providing".
+        granularitytimezone (str, optional): The timezone for the granularity. Defaults to "CET (Central European Time)".
+        columns (List[str], optional): The value columns to return without aggregate. Defaults to all value columns.
+        where (List[Tuple[str, str, object]], optional): Filters as (column, operator, value), e.g. ("volume", ">", 0).
+        The operators are "=", "!=", "<", "<=", ">", ">=" and "in".
+        group_by (List[str], optional): Columns to group by: "point", "type", "granularity", "granularitytimezone",
+        or the time buckets "year", "month", "day" and "hour" of validfrom.
+        aggregate (Dict[str, Union[str, List[str]]], optional): The aggregates per value column, "sum", "mean",
+        "min", "max" or "count". With a list of aggregates, the result columns are named column_aggregate.
+        as_dataframe (bool, optional): Whether to return a DataFrame instead of a list of dicts. Defaults to False.
+
+        Returns:
+        Union[pd.DataFrame, List[dict]]: The rows, or a row per group, ordered by the groups.
+        """
+        from .query import build_query
+
+        sql, params, names = build_query(
+            granularity,
+            points,
+            types,
+            start_date,
+            end_date,
+            classification,
+            activity,
+            granularitytimezone,
+            columns,
+            where,
+            group_by,
+            aggregate,
+        )
+
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            rows = [dict(zip(names, row)) for row in cursor]
+
+        if as_dataframe:
+            import pandas as pd
+
+            return pd.DataFrame(rows, columns=names)
+
+        return rows
@@ -0,0 +1,250 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Union, TYPE_CHECKING
+import sqlite3
+import threading
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+KEY_COLUMNS: List[str] = [
+    "point",
+    "type",
+    "granularity",
+    "granularitytimezone",
+    "validfrom",
+]
+
+VALUE_COLUMNS: List[str] = [
+    "capacity",
+    "volume",
+    "percentage",
+    "emission",
+    "emissionfactor",
+    "validto",
+    "lastupdate",
+]
+
+# The columns compared to decide whether a row changed, a forecast that is published again with
+# the same values only gets a new lastupdate
+COMPARED_COLUMNS: List[str] = [
+    column for column in VALUE_COLUMNS if column != "lastupdate"
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS vintages (
+    id INTEGER PRIMARY KEY,
+    fetched_at TEXT NOT NULL,
+    changed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vintages_fetched_at ON vintages (fetched_at);
+CREATE TABLE IF NOT EXISTS forecasts (
+    {", ".join(f"{column} TEXT NOT NULL" for column in KEY_COLUMNS)},
+    vintage INTEGER NOT NULL REFERENCES vintages (id),
+    {", ".join(VALUE_COLUMNS)},
+    PRIMARY KEY ({", ".join(KEY_COLUMNS)}, vintage)
+) WITHOUT ROWID;
+"""
+
+
+def to_utc_string(moment: datetime) -> str:
+    """
+    Function that formats a moment as a sortable UTC string, naive datetimes are taken as UTC.
+
+    Parameters:
+    moment (datetime): The moment to format.
+
+    Returns:
+    str: The moment in ISO format in UTC.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+class ForecastVintageStore:
+    """
+    SQLite store of forecast vintages, recording every fetch of a forecast as a vintage.
+
+    A vintage only stores the rows that are new or changed compared to the forecast as known
+    before it, so polling an unchanged forecast costs almost no storage. The forecast as known
+    at a moment is reconstructed by taking, for every series and validfrom, the latest row of
+    the vintages fetched up to that moment, which is served by the primary key index. Rows that
+    disappear from a later fetch are kept as they were last known. A row that is published again
+    with the same values is not stored again, so it keeps the lastupdate of its last change.
+
+    Parameters:
+    path (str, optional): The SQLite database file. Defaults to ":memory:".
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def vintages(self) -> List[dict]:
+        """
+        Function that returns the recorded vintages.
+
+        Returns:
+        List[dict]: The id, fetch moment and number of changed rows of every vintage.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT id, fetched_at, changed FROM vintages ORDER BY id"
+            )
+            return [
+                {"id": id, "fetched_at": fetched_at, "changed": changed}
+                for id, fetched_at, changed in cursor
+            ]
+
+    def record(
+        self,
+        rows: Union[List[dict], "pd.DataFrame"],
+        fetched_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Function that records a fetched forecast as a new vintage.
+
+        Parameters:
+        rows (Union[List[dict], pd.DataFrame]): The forecast as returned by NedAPI.get_forecast.
+        fetched_at (datetime, optional): The moment the forecast was fetched. Defaults to now.
+
+        Returns:
+        int: The id of the new vintage.
+        """
+        if not isinstance(rows, list):
+            rows = rows.to_dict("records")
+
+        fetched_at = to_utc_string(fetched_at or datetime.now(timezone.utc))
+        columns = KEY_COLUMNS + VALUE_COLUMNS
+
+        with self._lock, self._connection:
+            last = self._connection.execute(
+                "SELECT MAX(fetched_at) FROM vintages"
+            ).fetchone()[0]
+            if last is not None and fetched_at < last:
+                raise ValueError(
+                    f"Vintage fetched at {fetched_at} is older than the last vintage ({last})."
+                )
+
+            vintage = self._connection.execute(
+                "INSERT INTO vintages (fetched_at, changed) VALUES (?, 0)",
+                (fetched_at,),
+            ).lastrowid
+
+            self._connection.execute(
+                f"CREATE TEMP TABLE incoming ({', '.join(columns)})"
+            )
+            try:
+                self._connection.executemany(
+                    f"INSERT INTO incoming VALUES ({', '.join('?' * len(columns))})",
+                    (
+                        tuple(str(row[column]) for column in KEY_COLUMNS)
+                        + tuple(row.get(column) for column in VALUE_COLUMNS)
+                        for row in rows
+                    ),
+                )
+
+                # Only keep the rows that differ from the latest known row of their key
+                keys = " AND ".join(f"f.{c} = i.{c}" for c in KEY_COLUMNS)
+                same = " AND ".join(f"f.{c} IS i.{c}" for c in COMPARED_COLUMNS)
+                changed = self._connection.execute(
+                    f"""
+                    INSERT INTO forecasts ({', '.join(columns)}, vintage)
+                    SELECT {', '.join(f'i.{c}' for c in columns)}, ?
+                    FROM incoming i
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM forecasts f
+                        WHERE {keys} AND {same}
+                        AND f.vintage = (
+                            SELECT MAX(l.vintage) FROM forecasts l
+                            WHERE {keys.replace('f.', 'l.')}
+                        )
+                    )
+                    """,
+                    (vintage,),
+                ).rowcount
+            finally:
+                self._connection.execute("DROP TABLE incoming")
+
+            self._connection.execute(
+                "UPDATE vintages SET changed = ? WHERE id = ?", (changed, vintage)
+            )
+
+        return vintage
+
+    def as_of(
+        self,
+        moment: datetime,
+        points: Optional[List[str]] = None,
+        types: Optional[List[str]] = None,
+        granularity: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        as_dataframe: bool = False,
+    ) -> Union["pd.DataFrame", List[dict]]:
+        """
+        Function that reconstructs the forecast as known at a moment.
+
+        Parameters:
+        moment (datetime): The moment, naive datetimes are taken as UTC.
+        points (List[str], optional): Only return these points. Defaults to all points.
+        types (List[str], optional): Only return these types. Defaults to all types.
+        granularity (str, optional): Only return this granularity. Defaults to all granularities.
+        start_date (datetime, optional): Only return rows valid from this moment onwards, in the timezone of the data.
+        end_date (datetime, optional): Only return rows valid from before this moment, in the timezone of the data.
+        as_dataframe (bool, optional): Whether to return a DataFrame instead of a list of dicts. Defaults to False.
+
+        Returns:
+        Union[pd.DataFrame, List[dict]]: The forecast as known at the moment, with the vintage of every row.
+        """
+        with self._lock:
+            vintage = self._connection.execute(
+                "SELECT MAX(id) FROM vintages WHERE fetched_at <= ?",
+                (to_utc_string(moment),),
+            ).fetchone()[0]
+
+            conditions, params = ["vintage <= ?"], [vintage or 0]
+            for column, values in (("point", points), ("type", types)):
+                if values is not None:
+                    values = list(values)
+                    conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                    params.extend(values)
+            if granularity is not None:
+                conditions.append("granularity = ?")
+                params.append(granularity)
+            if start_date is not None:
+                conditions.append("validfrom >= ?")
+                params.append(start_date.strftime("%Y-%m-%dT%H:%M:%S"))
+            if end_date is not None:
+                conditions.append("validfrom < ?")
+                params.append(end_date.strftime("%Y-%m-%dT%H:%M:%S"))
+
+            # SQLite returns the other columns of the row with the maximum vintage
+            columns = KEY_COLUMNS + VALUE_COLUMNS
+            cursor = self._connection.execute(
+                f"""
+                SELECT {', '.join(columns)}, MAX(vintage) AS vintage
+                FROM forecasts
+                WHERE {' AND '.join(conditions)}
+                GROUP BY {', '.join(KEY_COLUMNS)}
+                """,
+                params,
+            )
+            names = [description[0] for description in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor]
+
+        if as_dataframe:
+            import pandas as pd
+
+            return pd.DataFrame(rows, columns=names)
+
+        return rows
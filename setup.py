@@ -29,6 +29,11 @@ setup(
         "requests",
         "typing",
     ],
+    extras_require={
+        "arrow": ["pyarrow>=14"],
+        "polars": ["pyarrow>=14", "polars"],
+    },
+    entry_points={"console_scripts": ["ned=ned.cli:main"]},
     python_requires=">=3.6, <4",
     url="https://github.com/profiteia/ned-py",
     project_urls={
@@ -0,0 +1,144 @@
+from datetime import timedelta
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ned import align_forecast
+
+
+def rows(point, type, hours, volume, minute=0, classification="Current"):
+    return [
+        {
+            "point": point,
+            "type": type,
+            "granularity": "Hour",
+            "granularitytimezone": "UTC",
+            "classification": classification,
+            "validfrom": f"2024-01-01T{hour:02d}:{minute:02d}:00+00:00",
+            "volume": volume + hour,
+        }
+        for hour in hours
+    ]
+
+
+def wide(result):
+    return (
+        pd.DataFrame(result)
+        .assign(validfrom=lambda df: pd.to_datetime(df["validfrom"]))
+        .pivot(index="validfrom", columns=["point", "type"], values="volume")
+    )
+
+
+def test_aligns_all_series_at_once():
+    forecast = rows("Zeeland", "Wind", range(24), 10, classification="Forecast")
+    forecast += rows("Utrecht", "Solar", range(24), 5, classification="Forecast")
+    # Unordered and with a missing hour
+    actual = rows("Utrecht", "Solar", range(23, 0, -1), 0) + rows(
+        "Zeeland", "Wind", range(24), 0
+    )
+
+    aligned = align_forecast(forecast, actual)
+
+    assert sorted(aligned) == [("Utrecht", "Solar"), ("Zeeland", "Wind")]
+    wind = aligned[("Zeeland", "Wind")]
+    assert wind.validfrom[0] == np.datetime64("2024-01-01T00:00:00")
+    assert (wind.error == 10).all() and len(wind.error) == 24
+    solar = aligned[("Utrecht", "Solar")]
+    assert len(solar.error) == 23 and (solar.error == 5).all()
+    assert (np.diff(solar.validfrom.astype(np.int64)) > 0).all()
+
+
+def test_inputs_give_the_same_result():
+    forecast = rows("Zeeland", "Wind", range(24), 10, classification="Forecast")
+    actual = rows("Zeeland", "Wind", range(24), 0)
+    expected = align_forecast(forecast, actual)[("Zeeland", "Wind")]
+
+    long = align_forecast(pd.DataFrame(forecast), pd.DataFrame(actual))
+    pivoted = align_forecast(wide(forecast), wide(actual))
+
+    for result in (long, pivoted):
+        np.testing.assert_array_equal(
+            result[("Zeeland", "Wind")].validfrom, expected.validfrom
+        )
+        np.testing.assert_array_equal(result[("Zeeland", "Wind")].error, expected.error)
+
+
+def test_wide_layout_with_gaps():
+    forecast = wide(
+        rows("Zeeland", "Wind", range(3), 10, classification="Forecast")
+        + rows("Utrecht", "Solar", range(3), 10, classification="Forecast")
+    )
+    # Zeeland lacks the second hour, which is padded with NaN
+    actual = wide(
+        rows("Zeeland", "Wind", [0, 2], 0) + rows("Utrecht", "Solar", range(3), 0)
+    )
+
+    aligned = align_forecast(forecast, actual)[("Zeeland", "Wind")]
+    assert aligned.error.tolist() == [10, 10]
+    assert aligned.validfrom.tolist() == [
+        np.datetime64("2024-01-01T00:00:00"),
+        np.datetime64("2024-01-01T02:00:00"),
+    ]
+
+    aligned = align_forecast(forecast, actual, tolerance=timedelta(hours=1))
+    # The second hour is matched with the first hour, not with the padding
+    assert aligned[("Zeeland", "Wind")].actual.tolist() == [0, 0, 2]
+
+
+def test_tolerance():
+    forecast = rows("Zeeland", "Wind", range(24), 10, 10, classification="Forecast")
+    actual = rows("Zeeland", "Wind", range(24), 0)
+
+    assert align_forecast(forecast, actual) == {}
+    aligned = align_forecast(forecast, actual, tolerance=timedelta(minutes=10))
+    assert (aligned[("Zeeland", "Wind")].error == 10).all()
+
+
+def test_validation():
+    forecast = rows("Zeeland", "Wind", range(24), 10, classification="Forecast")
+    actual = rows("Zeeland", "Wind", range(24), 0)
+
+    with pytest.raises(ValueError):
+        align_forecast(forecast, [dict(row, granularity="Day") for row in actual])
+    with pytest.raises(ValueError):
+        align_forecast(forecast, forecast)
+    assert align_forecast(forecast, []) == {}
+
+
+def test_faster_than_merge_asof():
+    # A month of quarter hours for 100 series, as the API returns them: strings, in series order
+    moments = pd.date_range("2024-01-01", periods=2976, freq="15min", tz="UTC")
+    validfrom = np.tile(moments.strftime("%Y-%m-%dT%H:%M:%S+00:00"), 100)
+    point = np.repeat([f"point{series}" for series in range(100)], len(moments))
+
+    def frame(classification):
+        return pd.DataFrame(
+            {
+                "point": point,
+                "type": "Wind",
+                "granularity": "Quarter",
+                "granularitytimezone": "UTC",
+                "classification": classification,
+                "validfrom": validfrom,
+                "volume": np.arange(len(point), dtype=float),
+            }
+        )
+
+    forecast, actual = frame("Forecast"), frame("Current")
+
+    start = time.perf_counter()
+    aligned = align_forecast(forecast, actual)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    left, right = (
+        df.assign(validfrom=pd.to_datetime(df["validfrom"], utc=True)).sort_values("validfrom")
+        for df in (forecast, actual)
+    )
+    merged = pd.merge_asof(left, right, on="validfrom", by=["point", "type"])
+    merged_elapsed = time.perf_counter() - start
+
+    assert len(aligned) == 100 and sum(len(a.error) for a in aligned.values()) == len(merged)
+    assert elapsed < merged_elapsed / 2
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from ned.assembly import SpillingAssembler, WideAssembler
+
+
+def batch(point, type, hours):
+    return [
+        {
+            "point": point,
+            "type": type,
+            "validfrom": f"2024-01-01T{hour:02d}:00:00+00:00",
+            "volume": hour,
+            "capacity": 100,
+        }
+        for hour in hours
+    ]
+
+
+def test_wide_layout():
+    assembler = WideAssembler("volume", "float32")
+    assembler.add(batch("Zeeland", "Wind", range(3)))
+    assembler.add(batch("Utrecht", "Solar", range(1, 4)))
+    result = assembler.result()
+
+    assert result.shape == (4, 2)
+    assert (result.dtypes == "float32").all()
+    assert result[("Zeeland", "Wind")].isna().sum() == 1
+
+
+def test_spilling():
+    pytest.importorskip("pyarrow")
+
+    assembler = SpillingAssembler(max_memory=1, as_dataframe=True)
+    assembler.add(batch("Zeeland", "Wind", range(3)))
+    assembler.add(batch("Utrecht", "Solar", range(3)))
+
+    with assembler.result() as result:
+        directory = result._directory
+        assert len(result) == 6 and result.chunks == 2
+        assert [len(chunk) for chunk in result] == [3, 3]
+        assert result.to_pandas().shape == (6, 5)
+        assert len(result.to_list()) == 6
+
+    assert not os.path.exists(directory)
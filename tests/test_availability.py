@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+from ned import AvailabilityIndex
+from ned.availability import months_between
+
+SERIES = (1, 2, 5, 1, 2)
+
+
+def test_months_between():
+    assert months_between(datetime(2023, 12, 30), datetime(2024, 2, 1)) == [
+        "2023-12",
+        "2024-01",
+    ]
+    assert months_between(datetime(2024, 1, 1), datetime(2024, 1, 1)) == ["2024-01"]
+
+
+def test_unknown_series():
+    index = AvailabilityIndex()
+    assert index.status(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2)) is None
+
+
+def test_only_requested_windows_recorded_empty():
+    index = AvailabilityIndex()
+    index.record(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2), False)
+    index.record(*SERIES, datetime(2024, 1, 2), datetime(2024, 1, 4), False)
+
+    assert index.status(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2)) is False
+    assert index.status(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 4)) is False
+    # Days that were not requested stay unknown
+    assert index.status(*SERIES, datetime(2024, 1, 15), datetime(2024, 1, 16)) is None
+    assert index.status(*SERIES, datetime(2024, 1, 3), datetime(2024, 1, 5)) is None
+
+
+def test_ongoing_window_not_recorded_empty():
+    index = AvailabilityIndex()
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    index.record(*SERIES, today, today + timedelta(days=1), False)
+
+    assert index.status(*SERIES, today, today + timedelta(days=1)) is None
+    assert index.recently_empty(*SERIES)
+
+
+def test_series_with_data_is_requested():
+    index = AvailabilityIndex()
+    index.record(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2), True)
+    index.record(*SERIES, datetime(2023, 1, 1), datetime(2023, 1, 2), False)
+
+    assert index.status(*SERIES, datetime(2024, 1, 5), datetime(2024, 1, 6)) is True
+    assert index.status(*SERIES, datetime(2024, 3, 5), datetime(2024, 3, 6)) is True
+    assert index.status(*SERIES, datetime(2023, 1, 1), datetime(2023, 1, 2)) is False
+    assert not index.recently_empty(*SERIES)
+
+
+def test_empty_result_expires():
+    index = AvailabilityIndex(reprobe_after=timedelta(seconds=0))
+    index.record(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2), False)
+
+    assert index.status(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2)) is None
+
+
+def test_persisted(tmp_path):
+    path = str(tmp_path / "availability.json")
+    index = AvailabilityIndex(path)
+    index.record(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2), True)
+    index.save()
+
+    assert AvailabilityIndex(path).status(
+        *SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2)
+    )
+
+
+def test_timezone_aware_dates():
+    index = AvailabilityIndex()
+    start = datetime(2024, 1, 1, 1, tzinfo=timezone(timedelta(hours=1)))
+    index.record(*SERIES, start, start + timedelta(days=1), False)
+
+    # The same window in UTC
+    assert index.status(*SERIES, datetime(2024, 1, 1), datetime(2024, 1, 2)) is False
+    assert (
+        index.status(
+            *SERIES,
+            datetime(2024, 1, 1, tzinfo=timezone.utc),
+            datetime(2024, 1, 2, tzinfo=timezone.utc),
+        )
+        is False
+    )
+    assert index.status(*SERIES, start, start + timedelta(hours=23)) is False
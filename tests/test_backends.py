@@ -0,0 +1,56 @@
+import pytest
+
+from ned import is_complete
+from ned.assembly import get_assembler
+from ned.budget import mark_incomplete
+
+pa = pytest.importorskip("pyarrow")
+
+
+def batch(point, type, hours):
+    return [
+        {
+            "point": point,
+            "type": type,
+            "validfrom": f"2024-01-01T{hour:02d}:00:00+01:00",
+            "volume": hour,
+            "percentage": None,
+        }
+        for hour in hours
+    ]
+
+
+def test_arrow_backend():
+    assembler = get_assembler(False, backend="arrow")
+    assembler.add(batch("Zeeland", "Wind", range(3)))
+    assembler.add([])
+    assembler.add(batch("Utrecht", "Solar", range(2)))
+    table = assembler.result()
+
+    assert table.num_rows == 5
+    assert pa.types.is_dictionary(table.schema.field("point").type)
+    assert table.schema.field("validfrom").type == pa.timestamp("s", "UTC")
+    assert table.schema.field("volume").type == pa.float64()
+    assert is_complete(table)
+    assert not is_complete(mark_incomplete(table, "deadline", False))
+
+    empty = mark_incomplete(None, "cancelled", False, "arrow")
+    assert isinstance(empty, pa.Table) and empty.num_rows == 0
+    assert empty.schema.metadata[b"reason"] == b"cancelled"
+
+
+def test_polars_backend():
+    pl = pytest.importorskip("polars")
+
+    assembler = get_assembler(False, backend="polars")
+    assembler.add(batch("Zeeland", "Wind", range(3)))
+    frame = assembler.result()
+
+    assert isinstance(frame, pl.DataFrame) and frame.height == 3
+
+
+def test_backend_validation():
+    with pytest.raises(ValueError):
+        get_assembler(False, backend="unknown")
+    with pytest.raises(ValueError):
+        get_assembler(False, layout="wide", backend="arrow")
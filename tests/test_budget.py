@@ -0,0 +1,52 @@
+import threading
+
+import pandas as pd
+
+from ned import PartialList, is_complete
+from ned.budget import FetchBudget, mark_incomplete
+
+
+def test_max_requests():
+    budget = FetchBudget(10, max_requests=2)
+    budget.requested()
+    assert budget.exhausted() is None
+    budget.requested()
+    assert budget.exhausted() == "max_requests"
+
+
+def test_deadline():
+    assert FetchBudget(10, deadline=0).exhausted() == "deadline"
+    assert FetchBudget(10, deadline=60).exhausted() is None
+
+
+def test_cancel():
+    cancel = threading.Event()
+    budget = FetchBudget(10, cancel=cancel)
+    assert budget.exhausted() is None
+    cancel.set()
+    assert budget.exhausted() == "cancelled"
+
+
+def test_progress():
+    reported = []
+    budget = FetchBudget(4, on_progress=reported.append)
+    budget.requested()
+    budget.completed(96)
+    budget.completed(0)
+
+    assert [progress.completed for progress in reported] == [1, 2]
+    assert reported[-1].planned == 4
+    assert reported[-1].rows == 96
+    assert reported[-1].eta is not None
+
+
+def test_mark_incomplete():
+    partial = mark_incomplete([{"volume": 1}], "deadline", False)
+    assert isinstance(partial, PartialList) and partial.reason == "deadline"
+    assert not is_complete(partial)
+
+    frame = mark_incomplete(None, "cancelled", True)
+    assert isinstance(frame, pd.DataFrame) and not is_complete(frame)
+
+    assert is_complete([{"volume": 1}])
+    assert is_complete(pd.DataFrame())
@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+import json
+import threading
+import time
+
+from ned import NedAPI, NedPool, is_complete
+
+
+class FakeResponse:
+    def __init__(self, document):
+        self.content = json.dumps(document).encode()
+        self.text = self.content.decode()
+        self.headers = {}
+        self.status_code = 200
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeSession:
+    """
+    Session that answers every utilizations request with one row per day, and counts the requests.
+    """
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None):
+        with self.lock:
+            self.calls.append(dict(params))
+        time.sleep(self.delay)
+
+        day = datetime.strptime(params["validfrom[after]"], "%Y-%m-%d")
+        end = datetime.strptime(params["validfrom[strictly_before]"], "%Y-%m-%d")
+        rows = []
+        while day < end:
+            rows.append(
+                {
+                    "point": f"/v1/points/{params['point']}",
+                    "type": f"/v1/types/{params['type']}",
+                    "granularity": f"/v1/granularities/{params['granularity']}",
+                    "granularitytimezone": "/v1/granularity_time_zones/"
+                    f"{params['granularitytimezone']}",
+                    "activity": f"/v1/activities/{params['activity']}",
+                    "classification": f"/v1/classifications/{params['classification']}",
+                    "validfrom": f"{day:%Y-%m-%d}T00:00:00+00:00",
+                    "volume": day.day,
+                    "lastupdate": "2024-02-01T00:00:00+00:00",
+                }
+            )
+            day += timedelta(days=1)
+
+        return FakeResponse({"hydra:member": rows, "hydra:totalItems": len(rows)})
+
+
+def client(delay=0, **kwargs):
+    kwargs.setdefault("sleep_time", 0)
+    nedapi = NedAPI("key", log_level="WARNING", **kwargs)
+    nedapi._session = FakeSession(delay)
+    return nedapi
+
+
+def production(nedapi, **kwargs):
+    # Two windows of 5 days
+    return nedapi.get_production(
+        "Hour",
+        datetime(2024, 1, 1),
+        datetime(2024, 1, 11),
+        types=["Wind"],
+        points=["Zeeland"],
+        **kwargs,
+    )
+
+
+def query(start_day, end_day):
+    return {
+        "function": "get_production",
+        "granularity": "Hour",
+        "start_date": datetime(2024, 1, start_day),
+        "end_date": datetime(2024, 1, end_day),
+        "types": ["Wind"],
+        "points": ["Zeeland"],
+    }
+
+
+def test_overlapping_queries_are_requested_once():
+    nedapi = client()
+
+    first, second = nedapi.get_many([query(1, 16), query(11, 21)])
+
+    # One period of 20 days in windows of 5 days, instead of 3 + 2 windows
+    assert len(nedapi._session.calls) == 4
+    assert [row["validfrom"][:10] for row in first] == [
+        f"2024-01-{day:02d}" for day in range(1, 16)
+    ]
+    assert [row["validfrom"][:10] for row in second] == [
+        f"2024-01-{day:02d}" for day in range(11, 21)
+    ]
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    nedapi = client(delay=0.2)
+    results = []
+
+    def worker():
+        results.append(
+            nedapi.get_production(
+                "Hour",
+                datetime(2024, 1, 1),
+                datetime(2024, 1, 3),
+                types=["Wind"],
+                points=["Zeeland"],
+            )
+        )
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The threads joined the request in flight instead of sending their own
+    assert len(nedapi._session.calls) == 1
+    assert len(results) == 4
+    assert all(result == results[0] and len(result) == 2 for result in results)
+
+
+def test_per_call_options_between_threads():
+    nedapi = client(delay=0.05)
+    results = {}
+
+    def worker(as_dataframe, end_day):
+        results[as_dataframe] = nedapi.get_production(
+            "Hour",
+            datetime(2024, 1, 1),
+            datetime(2024, 1, end_day),
+            types=["Wind"],
+            points=["Zeeland"],
+            as_dataframe=as_dataframe,
+        )
+
+    threads = [
+        threading.Thread(target=worker, args=(True, 3)),
+        threading.Thread(target=worker, args=(False, 4)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every call keeps its own options, and the instance settings are unchanged
+    assert results[True].shape[0] == 2
+    assert isinstance(results[False], list) and len(results[False]) == 3
+    assert nedapi.as_dataframe is False
+
+
+def test_deadline_stops_the_wait_for_a_slot():
+    nedapi = client(sleep_time=3)
+
+    start = time.monotonic()
+    result = production(nedapi, deadline=0.5)
+
+    assert time.monotonic() - start < 1.5
+    assert not is_complete(result) and result.reason == "deadline"
+    assert len(nedapi._session.calls) == 1 and len(result) == 5
+
+
+def test_cancel_stops_the_wait_for_a_slot():
+    nedapi = client(sleep_time=3)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+
+    start = time.monotonic()
+    result = production(nedapi, cancel=cancel)
+
+    assert time.monotonic() - start < 1.5
+    assert not is_complete(result) and result.reason == "cancelled"
+
+
+def test_deadline_stops_the_wait_for_a_slot_of_the_pool():
+    nedapi = client(pool=NedPool(key_interval=3))
+
+    start = time.monotonic()
+    result = production(nedapi, deadline=0.5)
+
+    assert time.monotonic() - start < 1.5
+    assert not is_complete(result) and len(nedapi._session.calls) == 1
+    assert nedapi.pool.waiting == 0
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+
+def modules_after(statement):
+    output = subprocess.check_output(
+        [sys.executable, "-c", f"import sys; {statement}; print(' '.join(sys.modules))"],
+        text=True,
+    )
+    return output.split()
+
+
+def test_import_does_not_load_pandas():
+    assert "pandas" not in modules_after("import ned")
+
+
+def test_list_mode_client_does_not_load_pandas():
+    assert "pandas" not in modules_after("import ned; ned.NedAPI('key')")
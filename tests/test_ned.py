@@ -183,3 +183,116 @@ def test_forecast_df():
         "15 minutes", pd.Timestamp(2024, 1, 1), pd.Timestamp(2024, 1, 2)
     )
     assert type(result) == pd.DataFrame and not result.empty
+
+
+def test_production_provinces_wide():
+    result = nedapi.get_production_provinces(
+        "Hour",
+        pd.Timestamp(2024, 1, 1),
+        pd.Timestamp(2024, 1, 2),
+        layout="wide",
+        dtype="float32",
+    )
+    assert type(result) == pd.DataFrame and not result.empty
+    assert result.columns.names == ["point", "type"]
+    assert (result.dtypes == "float32").all()
+
+
+def test_shared_client_per_call_options():
+    from concurrent.futures import ThreadPoolExecutor
+
+    def fetch(as_dataframe):
+        return nedapi.get_production_netherlands(
+            "Hour",
+            pd.Timestamp(2024, 1, 1),
+            pd.Timestamp(2024, 1, 2),
+            types=["Wind", "Solar"],
+            as_dataframe=as_dataframe,
+        )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(fetch, [False, True]))
+
+    assert type(results[0]) == list and len(results[0]) > 0
+    assert type(results[1]) == pd.DataFrame and len(results[1]) == len(results[0])
+
+
+def test_get_many():
+    queries = [
+        {
+            "function": "get_production_netherlands",
+            "granularity": "Hour",
+            "start_date": pd.Timestamp(2024, 1, 1),
+            "end_date": pd.Timestamp(2024, 1, 3),
+            "types": ["Wind"],
+        },
+        {
+            "function": "get_production_netherlands",
+            "granularity": "Hour",
+            "start_date": pd.Timestamp(2024, 1, 2),
+            "end_date": pd.Timestamp(2024, 1, 4),
+            "types": ["Wind", "Solar"],
+            "as_dataframe": True,
+        },
+    ]
+
+    many = nedapi.get_many(queries)
+    single = nedapi.get_production_netherlands(
+        "Hour",
+        pd.Timestamp(2024, 1, 2),
+        pd.Timestamp(2024, 1, 4),
+        types=["Wind", "Solar"],
+        as_dataframe=True,
+    )
+
+    assert type(many[0]) == list and len(many[0]) > 0
+    assert type(many[1]) == pd.DataFrame and len(many[1]) == len(single)
+
+
+def test_production_max_requests():
+    progress = []
+
+    result = nedapi.get_production_provinces(
+        "Hour",
+        pd.Timestamp(2024, 1, 1),
+        pd.Timestamp(2024, 1, 20),
+        types=["Wind"],
+        as_dataframe=False,
+        max_requests=2,
+        on_progress=progress.append,
+    )
+
+    assert not ned.is_complete(result) and result.reason == "max_requests"
+    assert progress[-1].requests == 2 and progress[-1].completed < progress[-1].planned
+
+
+def test_production_properties():
+    result = nedapi.get_production_netherlands(
+        "Hour",
+        pd.Timestamp(2024, 1, 1),
+        pd.Timestamp(2024, 1, 2),
+        types=["Wind"],
+        as_dataframe=False,
+        properties=["volume"],
+    )
+
+    assert len(result) > 0
+    assert set(result[0]) <= {"@id", "@type", "point", "type", "validfrom", "volume"}
+    assert nedapi.transfer_stats["requests"] > 0
+
+
+def test_sync_and_resync():
+    store = ned.LocalStore()
+    query = {
+        "function": "get_production_netherlands",
+        "granularity": "Day",
+        "start_date": pd.Timestamp(2024, 1, 1),
+        "end_date": pd.Timestamp(2024, 2, 1),
+        "types": ["Wind"],
+    }
+
+    stored = nedapi.sync(store, [query])
+    revisions = nedapi.resync(store, [query])
+
+    assert stored == len(store) > 0
+    assert revisions == []
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import ned.pool
+from ned import NedAPI, NedPool
+from tests.test_scheduler import Clock, advance, wait_until
+
+
+class Client:
+    pass
+
+
+def test_instances_share_session():
+    pool = NedPool()
+    first = NedAPI("key", pool=pool)
+    second = NedAPI("other-key", pool=pool)
+    assert first._session is second._session is pool.session
+    assert pool.clients == 2
+
+
+def test_default_pool_is_shared():
+    assert NedPool.default() is NedPool.default()
+
+
+def test_key_interval():
+    pool = NedPool(key_interval=0.05)
+    client = Client()
+    start = time.monotonic()
+    for _ in range(3):
+        pool.acquire(client, "key")
+    assert time.monotonic() - start >= 0.1
+
+
+def test_other_key_is_not_blocked():
+    pool = NedPool(key_interval=10)
+    pool.acquire(Client(), "busy-key")
+    assert pool.acquire(Client(), "other-key") < 1
+
+
+def test_clients_are_served_round_robin():
+    pool = NedPool(key_interval=0.01)
+    clients = [Client(), Client()]
+    order = []
+    lock = threading.Lock()
+
+    def worker(index):
+        pool.acquire(clients[index], "key")
+        with lock:
+            order.append(index)
+
+    # Queue a burst for the first client before the second one asks for a slot
+    pool.acquire(clients[0], "key")
+    threads = [threading.Thread(target=worker, args=(0,)) for _ in range(4)]
+    threads += [threading.Thread(target=worker, args=(1,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    assert 1 in order[:3]
+
+
+def test_higher_priority_is_served_first():
+    pool = NedPool(key_interval=0.02)
+    background, interactive = Client(), Client()
+    order = []
+    lock = threading.Lock()
+
+    def worker(client, priority):
+        pool.acquire(client, "key", priority)
+        with lock:
+            order.append(priority)
+
+    pool.acquire(background, "key")
+    threads = [
+        threading.Thread(target=worker, args=(background, "background"))
+        for _ in range(4)
+    ]
+    threads.append(threading.Thread(target=worker, args=(interactive, "interactive")))
+    for thread in threads:
+        thread.start()
+        time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    assert order.index("interactive") <= 1
+
+
+def test_key_budget_is_shared_between_threads(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ned.pool, "time", clock)
+    pool = NedPool(key_interval=10)
+    pool.acquire(Client(), "key")
+
+    threads = [
+        threading.Thread(target=pool.acquire, args=(Client(), "key")) for _ in range(3)
+    ]
+    threads.append(threading.Thread(target=pool.acquire, args=(Client(), "other-key")))
+    for thread in threads:
+        thread.start()
+
+    # The other key is not blocked, the clients of the key get one slot per interval
+    wait_until(lambda: pool.granted == 2 and pool.waiting == 3)
+    for granted in range(3, 6):
+        advance(clock, pool, 10)
+        wait_until(lambda: pool.granted >= granted)
+        assert pool.granted == granted
+    for thread in threads:
+        thread.join()
+
+
+def test_priority_order_with_fake_clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ned.pool, "time", clock)
+    pool = NedPool(key_interval=10)
+    background = Client()
+    pool.acquire(background, "key")
+    order = []
+
+    def worker(client, priority):
+        pool.acquire(client, "key", priority)
+        order.append(priority)
+
+    requests = [(background, "background")] * 3 + [(Client(), "interactive")]
+    threads = []
+    for request in requests:
+        threads.append(threading.Thread(target=worker, args=request))
+        threads[-1].start()
+        wait_until(lambda: pool.waiting == len(threads))
+
+    for granted in range(1, len(requests) + 1):
+        advance(clock, pool, 10)
+        wait_until(lambda: len(order) >= granted)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "background", "background", "background"]
@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+import ned.scheduler
+from ned import NedAPI
+from ned.scheduler import Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def wait_until(predicate):
+    timeout = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < timeout
+        time.sleep(0.001)
+
+
+def advance(clock, scheduler, seconds):
+    clock.now += seconds
+    with scheduler._condition:
+        scheduler._condition.notify_all()
+
+
+def run(scheduler, requests, delay=0.002):
+    order = []
+    lock = threading.Lock()
+
+    def worker(name, job, priority):
+        scheduler.acquire(job, priority)
+        with lock:
+            order.append(name)
+
+    threads = [threading.Thread(target=worker, args=request) for request in requests]
+    for thread in threads:
+        thread.start()
+        time.sleep(delay)
+    for thread in threads:
+        thread.join()
+
+    return order
+
+
+def test_new_windows_are_spaced_by_interval():
+    scheduler = Scheduler(0.05)
+    job = object()
+    start = time.monotonic()
+    for _ in range(3):
+        scheduler.acquire(job)
+    assert time.monotonic() - start >= 0.1
+
+
+def test_requests_within_a_window_are_not_spaced():
+    scheduler = Scheduler(10)
+    job = object()
+    scheduler.acquire(job)
+    assert scheduler.acquire(job, new_window=False) < 1
+
+
+def test_interactive_preempts_queued_background():
+    scheduler = Scheduler(0.02)
+    backfill = object()
+    scheduler.acquire(backfill, "background")
+
+    order = run(
+        scheduler,
+        [("background", backfill, "background")] * 4
+        + [("interactive", object(), "interactive")],
+    )
+
+    assert order.index("interactive") <= 1
+    assert scheduler.granted["interactive"] == 1
+
+
+def test_jobs_of_a_class_share_fairly():
+    scheduler = Scheduler(0.01)
+    first, second = object(), object()
+    scheduler.acquire(first)
+
+    order = run(
+        scheduler,
+        [("first", first, "normal")] * 4 + [("second", second, "normal")] * 2,
+    )
+
+    assert "second" in order[:3]
+
+
+def test_priority_is_validated():
+    with pytest.raises(ValueError):
+        Scheduler().acquire(object(), "urgent")
+    with pytest.raises(ValueError):
+        NedAPI("key", priority="urgent")
+
+
+def test_priority_order_with_fake_clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ned.scheduler, "time", clock)
+    scheduler = Scheduler(10)
+    scheduler.acquire(object())
+
+    order = []
+
+    def worker(name, job, priority):
+        scheduler.acquire(job, priority)
+        order.append(name)
+
+    backfill = object()
+    requests = [("background", backfill, "background")] * 3
+    requests += [("normal", object(), "normal"), ("interactive", object(), "interactive")]
+    threads = []
+    for request in requests:
+        threads.append(threading.Thread(target=worker, args=request))
+        threads[-1].start()
+        # Queued in a known order before any slot is free
+        wait_until(lambda: scheduler.waiting == len(threads))
+
+    # Every interval frees exactly one slot
+    for granted in range(1, len(requests) + 1):
+        advance(clock, scheduler, 10)
+        wait_until(lambda: len(order) >= granted)
+        assert len(order) == granted
+    for thread in threads:
+        thread.join()
+
+    assert order == ["interactive", "normal", "background", "background", "background"]
+
+
+def test_failed_wait_leaves_the_queue(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ned.scheduler, "time", clock)
+    scheduler = Scheduler(10)
+    scheduler.acquire(object())
+
+    def interrupted(timeout=None):
+        raise KeyboardInterrupt
+
+    scheduler._condition.wait = interrupted
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.acquire(object())
+    del scheduler._condition.wait
+
+    assert scheduler.waiting == 0
+    clock.now += 10
+    assert scheduler.acquire(object(), "background") == 0
@@ -0,0 +1,97 @@
+from datetime import datetime
+import os
+import threading
+
+import pytest
+
+from ned import NedAPI
+from ned.snapshot import read_manifest, write_snapshot
+
+pa = pytest.importorskip("pyarrow")
+
+
+def rows(volume):
+    return [
+        {
+            "point": "Zeeland",
+            "type": "Wind",
+            "validfrom": f"2024-01-01T{hour:02d}:00:00+01:00",
+            "volume": volume + hour,
+        }
+        for hour in range(24)
+    ]
+
+
+def test_snapshot_is_memory_mapped(tmp_path):
+    entry = write_snapshot(
+        str(tmp_path), "production", rows(0), {"granularity": "Hour"}
+    )
+    allocated = pa.total_allocated_bytes()
+
+    table = NedAPI.load_snapshot(str(tmp_path), "production")
+
+    assert pa.total_allocated_bytes() == allocated
+    assert table.num_rows == entry["rows"] == 24
+    assert table.column("volume").to_pylist() == list(range(24))
+    assert read_manifest(str(tmp_path))["production"]["query"] == {
+        "granularity": "Hour"
+    }
+
+
+def test_publish_replaces_previous_file(tmp_path):
+    first = write_snapshot(str(tmp_path), "production", rows(0))
+    mapped = NedAPI.load_snapshot(str(tmp_path), "production")
+    second = write_snapshot(str(tmp_path), "production", rows(100))
+
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["manifest.json", "manifest.json.lock", second["file"]]
+    )
+    assert first["file"] != second["file"]
+    # A reader that mapped the previous snapshot keeps its copy
+    assert mapped.column("volume")[0].as_py() == 0
+    latest = NedAPI.load_snapshot(str(tmp_path), "production")
+    assert latest.column("volume")[0].as_py() == 100
+
+
+def test_concurrent_publishes_keep_all_entries(tmp_path):
+    names = [f"production-{index}" for index in range(8)]
+    threads = [
+        threading.Thread(target=write_snapshot, args=(str(tmp_path), name, rows(0)))
+        for name in names
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshots = read_manifest(str(tmp_path))
+    assert sorted(snapshots) == sorted(names)
+    assert all(os.path.exists(tmp_path / entry["file"]) for entry in snapshots.values())
+
+
+def test_load_snapshot_backends(tmp_path):
+    write_snapshot(str(tmp_path), "production", rows(0))
+
+    assert NedAPI.load_snapshot(str(tmp_path), "production", "pandas").shape == (24, 4)
+    with pytest.raises(ValueError):
+        NedAPI.load_snapshot(str(tmp_path), "forecast")
+    with pytest.raises(ValueError):
+        NedAPI.load_snapshot(str(tmp_path), "production", "numpy")
+
+
+def test_incomplete_fetch_is_not_published(tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    query = {
+        "function": "get_production",
+        "granularity": "Hour",
+        "start_date": datetime(2024, 1, 1),
+        "end_date": datetime(2024, 1, 2),
+        "cancel": cancel,
+    }
+
+    with pytest.raises(ValueError, match="cancelled"):
+        NedAPI("key", log_level="WARNING").publish_snapshot(
+            str(tmp_path), "production", query
+        )
+    assert read_manifest(str(tmp_path)) == {}
@@ -0,0 +1,223 @@
+from datetime import datetime, timezone
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ned import LocalStore
+from ned.query import build_query
+from ned.serve import make_server, read_arguments
+from ned.store import SERIES_COLUMNS
+from tests.test_fetch import client
+
+
+def rows(volume, day=1, types=("Wind", "Solar")):
+    return [
+        {
+            "activity": "Providing",
+            "classification": "Current",
+            "granularity": "Hour",
+            "granularitytimezone": "CET (Central European Time)",
+            "point": "Zeeland",
+            "type": type,
+            "validfrom": f"2024-01-0{day}T0{hour}:00:00+00:00",
+            "validto": f"2024-01-0{day}T0{hour + 1}:00:00+00:00",
+            "volume": volume + hour,
+            "capacity": 100,
+            "lastupdate": "2024-01-02T00:00:00+00:00",
+        }
+        for type in types
+        for hour in range(3)
+    ]
+
+
+@pytest.fixture
+def store():
+    store = LocalStore()
+    yield store
+    store.close()
+
+
+def test_upsert_replaces_rows(store):
+    store.upsert(rows(10))
+    store.upsert(rows(20, types=["Wind"]))
+
+    read = store.get_request(
+        "Hour", "Current", "Providing", datetime(2024, 1, 1), datetime(2024, 1, 2)
+    )
+
+    assert len(store) == 6
+    assert [row["volume"] for row in read if row["type"] == "Wind"] == [20, 21, 22]
+    assert [row["volume"] for row in read if row["type"] == "Solar"] == [10, 11, 12]
+    assert read[0]["percentage"] is None
+
+
+def test_get_request_filters_on_days_and_series(store):
+    store.upsert(rows(10, day=1) + rows(10, day=2))
+
+    read = store.get_request(
+        "Hour", "Current", "Providing", "2024-01-02", "2024-01-03", types=["Solar"]
+    )
+
+    assert len(read) == 3
+    assert {row["type"] for row in read} == {"Solar"}
+    assert all(row["validfrom"].startswith("2024-01-02") for row in read)
+    assert (
+        store.get_request("Hour", "Forecast", "Providing", "2024-01-01", "2024-01-03")
+        == []
+    )
+
+
+def test_synced_until(store):
+    series = {key: rows(0)[0][key] for key in SERIES_COLUMNS}
+
+    assert store.synced_until(series) is None
+    store.set_synced_until(series, datetime(2024, 1, 5))
+    assert store.synced_until(series) == "2024-01-05"
+    assert store.sync_status()[0]["synced_until"] == "2024-01-05"
+
+
+def test_read_arguments():
+    arguments = read_arguments(
+        "function=get_production&granularity=Hour&start_date=2024-01-01"
+        "&types=Wind,Solar&types=Biogas"
+    )
+
+    assert arguments["classification"] == "Current"
+    assert arguments["activity"] == "Providing"
+    assert arguments["types"] == ["Wind", "Solar", "Biogas"]
+    assert arguments["end_date"] == datetime(2024, 1, 6)
+
+    with pytest.raises(ValueError):
+        read_arguments("granularity=Hour&start_date=2024-01-01&sleep_time=1")
+    with pytest.raises(ValueError):
+        read_arguments("granularity=Hour&classification=Current&activity=Providing")
+
+
+def test_server(store):
+    store.upsert(rows(10))
+    server = make_server(store, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    try:
+        with urllib.request.urlopen(
+            f"{url}/utilizations?function=get_production&granularity=Hour"
+            "&start_date=2024-01-01&end_date=2024-01-02&types=Wind&points=Zeeland"
+        ) as response:
+            read = json.load(response)
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/utilizations?granularity=Minute")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [row["volume"] for row in read] == [10, 11, 12]
+    assert error.value.code == 400
+
+
+def test_query_aggregates(store):
+    store.upsert(rows(10, day=1) + rows(20, day=2))
+
+    read = store.query(
+        "Hour",
+        points=["Zeeland"],
+        types=["Wind"],
+        start_date="2024-01-01",
+        end_date="2024-01-03",
+        group_by=["type", "day"],
+        aggregate={"volume": ["sum", "max"], "capacity": "mean"},
+    )
+
+    assert [row["day"] for row in read] == ["2024-01-01", "2024-01-02"]
+    assert [row["volume_sum"] for row in read] == [33, 63]
+    assert [row["volume_max"] for row in read] == [12, 22]
+    assert [row["capacity"] for row in read] == [100, 100]
+
+
+def test_query_reads_only_requested_columns(store):
+    store.upsert(rows(10))
+
+    read = store.query(
+        "Hour", types=["Solar"], columns=["volume"], where=[("volume", ">", 10)]
+    )
+
+    assert [list(row) for row in read] == [["point", "type", "validfrom", "volume"]] * 2
+    assert [row["volume"] for row in read] == [11, 12]
+
+
+def test_query_is_pushed_down(store):
+    sql, params, _ = build_query(
+        "Hour", types=["Solar"], start_date="2024-01-01", end_date="2024-02-01"
+    )
+    cursor = store._connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    plan = " ".join(row[-1] for row in cursor)
+
+    assert "USING PRIMARY KEY" in plan
+    assert "validfrom>? AND validfrom<?" in plan
+
+
+def test_query_validates_names(store):
+    with pytest.raises(ValueError):
+        store.query("Hour", points=["Amsterdam"])
+    with pytest.raises(ValueError):
+        store.query("Hour", group_by=["validto"], aggregate={"volume": "sum"})
+    with pytest.raises(ValueError):
+        store.query("Hour", where=[("volume; DROP TABLE utilizations", "=", 0)])
+
+
+def test_fingerprint_and_replace(store):
+    store.upsert(rows(10))
+    series = {key: rows(0)[0][key] for key in SERIES_COLUMNS}
+
+    assert store.fingerprint(series, "2024-01-01", "2024-01-02") == (
+        3,
+        "2024-01-02T00:00:00+00:00",
+    )
+
+    revised = rows(10, types=["Wind"])[:2]
+    revised[1]["volume"] = 50
+    revised[1]["lastupdate"] = "2024-01-03T00:00:00+00:00"
+    revised.append(dict(revised[0], validfrom="2024-01-01T05:00:00+00:00"))
+
+    assert store.replace(series, "2024-01-01", "2024-01-02", revised) == {
+        "added": 1,
+        "removed": 1,
+        "revised": 1,
+    }
+    assert store.fingerprint(series, "2024-01-01", "2024-01-02") == (
+        3,
+        "2024-01-03T00:00:00+00:00",
+    )
+    assert len(store) == 6
+
+    # Published again with the same values
+    republished = [dict(row, lastupdate="2024-01-04T00:00:00+00:00") for row in revised]
+    assert store.replace(series, "2024-01-01", "2024-01-02", republished) == {
+        "added": 0,
+        "removed": 0,
+        "revised": 0,
+    }
+    assert store.fingerprint(series, "2024-01-01", "2024-01-02")[1] == (
+        "2024-01-04T00:00:00+00:00"
+    )
+
+
+def test_sync_with_timezone_aware_dates(store):
+    nedapi = client()
+    query = {
+        "function": "get_production",
+        "granularity": "Hour",
+        "start_date": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "end_date": datetime(2024, 1, 6, tzinfo=timezone.utc),
+        "types": ["Wind"],
+        "points": ["Zeeland"],
+    }
+
+    assert nedapi.sync(store, [query]) == 5
+    # The second sync starts from the synced day minus the lookback
+    assert nedapi.sync(store, [query]) == 1
+    assert nedapi.resync(store, [query]) == []
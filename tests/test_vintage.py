@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from ned import ForecastVintageStore
+
+
+def forecast(volume, hours=3):
+    return [
+        {
+            "point": "Zeeland",
+            "type": "Wind",
+            "granularity": "Hour",
+            "granularitytimezone": "UTC",
+            "validfrom": f"2024-01-01T0{hour}:00:00+00:00",
+            "validto": f"2024-01-01T0{hour + 1}:00:00+00:00",
+            "volume": volume + hour,
+            "capacity": 100,
+            "percentage": 0.5,
+            "emission": 0,
+            "emissionfactor": 0,
+            "lastupdate": "2024-01-01T00:00:00+00:00",
+        }
+        for hour in range(hours)
+    ]
+
+
+@pytest.fixture
+def store():
+    store = ForecastVintageStore()
+    yield store
+    store.close()
+
+
+def test_only_changed_rows_are_stored(store):
+    moment = datetime(2024, 1, 1)
+    store.record(forecast(10), moment)
+    # Published again with the same values
+    republished = [
+        dict(row, lastupdate="2024-01-01T00:15:00+00:00") for row in forecast(10)
+    ]
+    store.record(republished, moment + timedelta(minutes=15))
+    changed = forecast(10)
+    changed[1]["volume"] = 50
+    store.record(changed, moment + timedelta(minutes=30))
+
+    assert [vintage["changed"] for vintage in store.vintages()] == [3, 0, 1]
+
+
+def test_as_of(store):
+    moment = datetime(2024, 1, 1)
+    store.record(forecast(10), moment)
+    store.record(forecast(20), moment + timedelta(minutes=15))
+
+    assert store.as_of(moment - timedelta(minutes=1)) == []
+    assert [row["volume"] for row in store.as_of(moment)] == [10, 11, 12]
+    assert [row["volume"] for row in store.as_of(moment + timedelta(hours=1))] == [20, 21, 22]
+
+
+def test_as_of_filters(store):
+    store.record(forecast(10), datetime(2024, 1, 1))
+
+    rows = store.as_of(datetime(2024, 1, 2), start_date=datetime(2024, 1, 1, 1))
+    assert len(rows) == 2
+    assert store.as_of(datetime(2024, 1, 2), points=["Utrecht"]) == []
+
+
+def test_vintages_are_chronological(store):
+    store.record(forecast(10), datetime(2024, 1, 2))
+
+    with pytest.raises(ValueError):
+        store.record(forecast(10), datetime(2024, 1, 1))